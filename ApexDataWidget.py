@@ -2,20 +2,29 @@ from PyQt5 import QtCore, QtGui
 from PyQt5.QtCore import QDate
 from PyQt5.QtWidgets import *
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.collections import PolyCollection
+from matplotlib.colors import to_rgba
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 import numpy as np
-import mplcursors
 import matplotlib.dates as mdates
-from custom_calendar import CustomCalendar
+from custom_calendar import CustomCalendar, HeatmapCalendar
 from SettingsApexDataWidget import SettingsWidget
 from TradeImageWidget import ScreenshotPrompt, ScreenshotUpload, ScreenshotDisplay
+import account_summary
+import drawdown
+import downsample
+import apex_analytics
+import screenshot_cache
+from hover_overlay import HoverOverlay
 import os
 import json
 import re
 
 
 class ApexDataWidget(QDialog):
+    analytics_requested = QtCore.pyqtSignal(object)
+
     def __init__(self, parent=None):
         super(ApexDataWidget, self).__init__(parent)
         self.setGeometry(100, 100, 1600, 600)
@@ -25,8 +34,8 @@ class ApexDataWidget(QDialog):
         self._is_moving = False
         self._start_pos = None
         self.current_date = QDate.currentDate()
-        self.targets = {25: 1500, 50: 3000, 75: 4250, 100: 6000, 150: 9000, 250: 15000, 300: 20000}
-        self.stop_losses = {25: 1500, 50: 2500, 75: 2750, 100: 3000, 150: 5000, 250: 6500, 300: 7500}
+        self.targets = drawdown.targets
+        self.stop_losses = drawdown.stop_losses
         self.screenshots_dir = 'resources/screenshots'
         self.mapping_file = os.path.join(self.screenshots_dir, 'screenshot_mapping.json')
         self.screenshots = self.load_screenshots()
@@ -47,8 +56,34 @@ class ApexDataWidget(QDialog):
         self.main_layout_vertical.addWidget(self.top_frame)
         self.main_layout_vertical.addWidget(self.bottom_frame)
         self.accountselection_comboBox.currentIndexChanged.connect(self.display_selected_account)
-        self.first_dateEdit.dateChanged.connect(self.updateWithDate)
-        self.second_dateEdit.dateChanged.connect(self.updateWithDate)
+        # Stepping a date fires dateChanged for every intermediate value, the burst is coalesced into
+        # one recompute once the edits have been idle for update_delay ms
+        self.update_delay = 150
+        self.update_generation = 0
+        self.skipped_updates = 0
+        self.update_timer = QtCore.QTimer(self)
+        self.update_timer.setSingleShot(True)
+        self.update_timer.timeout.connect(self.run_scheduled_update)
+        self.dropped_results = 0
+        self.setupAnalyticsWorker()
+        self.first_dateEdit.dateChanged.connect(self.schedule_update)
+        self.second_dateEdit.dateChanged.connect(self.schedule_update)
+
+    def setupAnalyticsWorker(self):
+        # Filtering, rollups, stats and drawdown series are computed on a worker thread, the GUI thread
+        # only moves artists and labels once a result is back
+        self.analytics_thread, self.analytics_worker = apex_analytics.start_worker()
+        self.analytics_requested.connect(self.analytics_worker.run)
+        self.analytics_worker.finished.connect(self.apply_analytics)
+        self.analytics_worker.failed.connect(self.on_analytics_failed)
+        QApplication.instance().aboutToQuit.connect(self.stop_analytics)
+        # A dialog dropped without being closed only asks its thread to quit, apex_analytics keeps the
+        # thread alive until it has
+        self.destroyed.connect(self.analytics_thread.quit)
+
+    def stop_analytics(self):
+        self.update_timer.stop()
+        apex_analytics.stop_worker(self.analytics_thread)
 
     def setupTopFrame(self):
         self.top_frame = QFrame()
@@ -76,11 +111,21 @@ class ApexDataWidget(QDialog):
         account_settings_icon = QtGui.QIcon()
         account_settings_icon.addPixmap(QtGui.QPixmap("resources/settings-v-svgrepo-com.svg"), QtGui.QIcon.Normal, QtGui.QIcon.Off)
         self.account_settings_button.setIcon(account_settings_icon)
+        self.overview_button = QPushButton("Overview", self.data_management_frame, clicked=self.open_portfolio_overview)
+        self.aggregation_comboBox = QComboBox(self.data_management_frame)
+        self.aggregation_comboBox.addItems(['Auto'] + account_summary.aggregation_levels)
+        self.aggregation_comboBox.currentIndexChanged.connect(lambda index: self.update_aggregation())
+        self.calendar_comboBox = QComboBox(self.data_management_frame)
+        self.calendar_comboBox.addItems(['Calendar', 'Heatmap', 'Year Heatmap'])
+        self.calendar_comboBox.currentIndexChanged.connect(self.change_calendar_mode)
         self.load_apex_accounts()
         self.data_management_frame_layout_horizontal.addWidget(self.first_dateEdit)
         self.data_management_frame_layout_horizontal.addWidget(self.second_dateEdit)
         self.data_management_frame_layout_horizontal.addWidget(self.accountselection_comboBox)
+        self.data_management_frame_layout_horizontal.addWidget(self.aggregation_comboBox)
+        self.data_management_frame_layout_horizontal.addWidget(self.calendar_comboBox)
         self.data_management_frame_layout_horizontal.addWidget(self.account_settings_button)
+        self.data_management_frame_layout_horizontal.addWidget(self.overview_button)
 
     def setupTopFrameTitle(self):
         self.top_frame_title = QLabel("Apex Account(s) Data")
@@ -146,18 +191,81 @@ class ApexDataWidget(QDialog):
         horizontal_layout.addWidget(self.first_graph_frame)
         horizontal_layout.addWidget(self.second_graph_frame)
         horizontal_layout.addWidget(self.third_graph_frame)
+        self.setupLineGraph()
+        self.setupTradePerformanceGraph()
+        self.calendar = CustomCalendar(parent=None)
+        self.calendar.setGeometry(0, 0, 600, 400)
+        self.heatmap = HeatmapCalendar()
+        self.calendar_stack = QStackedWidget(self.third_graph_frame)
+        self.calendar_stack.addWidget(self.calendar)
+        self.calendar_stack.addWidget(self.heatmap)
+        self.third_graph_frame.layout().addWidget(self.calendar_stack)
         return graphs_frame
 
+    def setupLineGraph(self):
+        # One figure for the lifetime of the widget, updates only move the artists' data
+        self.line_figure = Figure(facecolor='#F0F0F0')
+        self.line_canvas = FigureCanvas(self.line_figure)
+        ax = self.line_ax = self.line_figure.add_subplot()
+        ax.set_facecolor('#F0F0F0')
+        self.profit_line, = ax.plot([], [], color='black', label='Cumulative Profit', linewidth=0.4)
+        self.trade_points = ax.scatter([], [], color='black', s=6, zorder=5, label='Trades')
+        self.zero_line = ax.axhline(0, color='black', linestyle='--', linewidth=0.4, label='$0')
+        self.target_line = ax.axhline(0, color='green', linestyle='--', linewidth=0.6, label='Target', visible=False)
+        self.threshold_line, = ax.plot([], [], drawstyle='steps-post', color='red', linestyle='--', linewidth=0.6, label='Trailing Threshold', visible=False)
+        ax.grid(False)
+        ax.xaxis.set_major_locator(mdates.MonthLocator())
+        ax.xaxis.set_minor_locator(mdates.WeekdayLocator())
+        ax.tick_params(labelbottom=False, labelleft=False)
+        self.line_figure.tight_layout(pad=0, h_pad=0, w_pad=0)
+        ax.set_title("Profit Across Trades")
+        self.line_x = self.line_y = np.empty(0)
+        self.line_indices = np.empty(0, dtype='int64')
+        self.line_hover = HoverOverlay(self.line_canvas, ax, self.line_index_at)
+        # Re-pick the drawn points whenever the visible range or the axis width changes
+        ax.callbacks.connect('xlim_changed', lambda ax: self.update_line_detail())
+        self.line_canvas.mpl_connect('resize_event', lambda event: self.update_line_detail())
+        self.first_graph_frame.layout().addWidget(self.line_canvas)
+
+    def setupTradePerformanceGraph(self):
+        self.bar_figure = Figure(figsize=(6, 4), facecolor='#F0F0F0')
+        self.bar_canvas = FigureCanvas(self.bar_figure)
+        ax = self.bar_ax = self.bar_figure.add_subplot()
+        ax.set_facecolor('#F0F0F0')
+        ax.set_title('Trade Performance')
+        ax.axhline(0, color='grey', linewidth=0.8)
+        # Fixed margins: tight_layout on an empty axes would not leave room for the profit tick labels
+        self.bar_figure.subplots_adjust(left=0.14, right=0.98, top=0.9, bottom=0.08)
+        # All bars are one collection sitting at x = 0..n-1, so a redraw is one set_verts and a hit test
+        # is round(xdata) instead of asking every bar whether it contains the pointer
+        self.bar_width = 0.8
+        self.bars = PolyCollection([], edgecolors='none')
+        ax.add_collection(self.bars)
+        self.bar_heights = np.empty(0)
+        self.bar_data = pd.DataFrame()
+        self.bar_level = 'Trade'
+        # (bars, tooltips) per aggregation level for the current range, switching levels only swaps them
+        self.bar_views = {}
+        self.bar_canvas.mpl_connect('button_press_event', self.on_click)
+        self.bar_hover = HoverOverlay(self.bar_canvas, ax, self.bar_index_at)
+        self.bar_canvas.mpl_connect('resize_event', lambda event: self.update_aggregation(resized=True))
+        self.no_trades_label = QLabel("No trades were made in this date range.")
+        self.no_trades_label.hide()
+        self.second_graph_frame.layout().addWidget(self.bar_canvas)
+        self.second_graph_frame.layout().addWidget(self.no_trades_label)
+
     def load_apex_accounts(self):
+        self.apex_accounts = []
         try:
-            data_file_path = 'resources/to_use_data.csv'
             visibility_file_path = 'resources/account_settings.csv'
-            self.data = pd.read_csv(data_file_path)
+            self.summaries = account_summary.load_summaries()
             self.data_settings = pd.read_csv(visibility_file_path)
-            accounts = self.data['Account'].unique()
+            self.update_drawdowns()
+            accounts = self.summaries.accounts()
             apex_accounts = sorted([account for account in accounts if 'Apex' in account])
             visible_accounts = self.data_settings[self.data_settings['Visibility'] == 'visible']['Account']
             visible_apex_accounts = [account for account in apex_accounts if account in visible_accounts.values]
+            self.apex_accounts = visible_apex_accounts
             self.accountselection_comboBox.clear()
             self.accountselection_comboBox.addItems(visible_apex_accounts)
             self.accountselection_comboBox.setCurrentIndex(-1)
@@ -167,14 +275,16 @@ class ApexDataWidget(QDialog):
         except Exception as e:
             print(f"Error loading accounts: {e}")
 
-    def filter_data_by_date_range(self, data, start_date, end_date):
-        data = data.copy()
-        data['ExitT'] = pd.to_datetime(data['ExitT'], format="%Y-%m-%d %H:%M:%S")
-        start_date = pd.to_datetime(start_date)
-        end_date = pd.to_datetime(end_date) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
-        data = data[(data['ExitT'] >= start_date) & (data['ExitT'] <= end_date)]
-        data['ExitT'] = data['ExitT'].dt.strftime("%Y-%m-%d %H:%M:%S")
-        return data
+    def update_drawdowns(self):
+        # Trailing threshold and target distances for every account in one batched pass
+        self.drawdowns = drawdown.evaluate_accounts(self.summaries, self.data_settings)
+        drawdown.update_account_lines(self.drawdowns, self.data_settings, 'resources/account_settings.csv')
+
+    def selected_range(self):
+        # The date edits' days as [first day 00:00, last day 23:59:59.999999999]
+        start_date = pd.to_datetime(self.first_dateEdit.date().toString("yyyy-MM-dd"))
+        end_date = pd.to_datetime(self.second_dateEdit.date().toString("yyyy-MM-dd")) + pd.Timedelta(days=1) - pd.Timedelta(nanoseconds=1)
+        return start_date, end_date
 
     def has_new_data(self, data):
         account_row = self.data_settings.loc[self.data_settings['Account'] == self.selected_account]
@@ -188,28 +298,78 @@ class ApexDataWidget(QDialog):
 
     def display_selected_account(self):
         try:
+            # The new account replaces any range update still waiting for its turn
+            self.cancel_scheduled_update()
             self.selected_account = self.accountselection_comboBox.currentText()
-            self.account_data = self.data[self.data['Account'] == self.selected_account]
+            summary = self.summaries.get(self.selected_account)
             print(f"Selected Account: {self.selected_account}")  # Debug statement
-            if self.account_data.empty:
+            if summary is None or summary.trades.empty:
                 print("Account data is empty")
                 return
+            # Trade-level and daily rollups, already grouped when the trades were imported
+            self.account_summary = summary
+            self.account_data = summary.trades
+            self.account_curve = self.drawdowns.curve(self.selected_account)
             self.updateDateEdits()
-            self.updateStatsLabels(self.account_data)
-            self.plot_line_graph(self.account_data)
-            self.plot_trade_performance(self.account_data)
-            self.plot_calendar(self.account_data)
+            self.request_analytics()
+            self.prefetch_screenshots()
         except Exception as e:
             print(f"Error displaying selected account: {e}")
 
+    def next_generation(self):
+        # A new generation makes every request and result before it stale, the worker is told right away
+        # so requests still queued behind the current one are skipped
+        self.update_generation += 1
+        self.analytics_worker.latest_generation = self.update_generation
+        return self.update_generation
+
+    def schedule_update(self):
+        # Every request bumps the generation, a request replaced before it ran counts as skipped
+        if self.update_timer.isActive():
+            self.skipped_updates += 1
+        self.next_generation()
+        self.update_timer.start(self.update_delay)
+
+    def cancel_scheduled_update(self):
+        if self.update_timer.isActive():
+            self.update_timer.stop()
+            self.skipped_updates += 1
+        self.next_generation()
+
+    def run_scheduled_update(self):
+        self.updateWithDate()
+
     def updateWithDate(self):
-        start_date = self.first_dateEdit.date().toString("yyyy-MM-dd")
-        end_date = self.second_dateEdit.date().toString("yyyy-MM-dd")
-        filtered_data = self.filter_data_by_date_range(self.account_data, start_date, end_date)
-        self.updateStatsLabels(filtered_data)
-        self.plot_line_graph(filtered_data)
-        self.plot_trade_performance(filtered_data)
-        self.plot_calendar(filtered_data)
+        self.request_analytics(*self.selected_range())
+
+    def request_analytics(self, start=None, end=None):
+        accounts = self.drawdowns.accounts
+        request = apex_analytics.AnalyticsRequest(
+            generation=self.next_generation(),
+            account=self.selected_account,
+            summary=self.account_summary,
+            curve=self.account_curve,
+            bet=self.account_row['BeT'].values[0],
+            target=accounts['Target'].get(self.selected_account),
+            breach=accounts['BreachT'].get(self.selected_account),
+            target_lines=not self.account_row.empty and self.account_row['TargetLines'].values[0] == 'On',
+            start=start,
+            end=end)
+        self.analytics_requested.emit(request)
+
+    def apply_analytics(self, result):
+        # A result for an outdated selection is dropped, the request that replaced it is already queued
+        if result.generation != self.update_generation:
+            self.dropped_results += 1
+            return
+        self.updateStatsLabels(result)
+        self.plot_line_graph(result)
+        self.plot_trade_performance(result)
+        self.plot_calendar(result.daily)
+
+    def on_analytics_failed(self, generation, error):
+        if generation == self.update_generation:
+            print(f"Error computing account analytics: {error}")
 
     def updateDateEdits(self):
         self.first_dateEdit.setEnabled(False)
@@ -219,8 +379,8 @@ class ApexDataWidget(QDialog):
         self.second_dateEdit.clearMaximumDate()
         self.second_dateEdit.clearMinimumDate()
         self.account_row = self.data_settings.loc[self.data_settings['Account'] == self.selected_account]
-        account_first_date = pd.to_datetime(self.account_data['EntryT']).min()
-        account_last_date = pd.to_datetime(self.account_data['ExitT']).max()
+        account_first_date = self.account_data['EntryT'].min()
+        account_last_date = self.account_data['ExitT'].max()
         if pd.isnull(account_first_date) or pd.isnull(account_last_date):
             print("Invalid date range")
             return
@@ -237,117 +397,143 @@ class ApexDataWidget(QDialog):
         self.first_dateEdit.setEnabled(True)
         self.second_dateEdit.setEnabled(True)
 
-    def updateStatsLabels(self, data):
-        pips = self.account_row['BeT'].values[0]
-        grouped_data = data.groupby('EntryT').agg({'Profit': 'sum', 'LorS': 'first', 'Instrument': 'first'}).reset_index()
-
-        def get_threshold(instrument):
-            if 'MES' in instrument:
-                return pips * 1.25
-            elif 'ES' in instrument:
-                return pips * 12.5
-            return 0
-
-        w_be_l = grouped_data.apply(lambda row: 'L' if row['Profit'] < 0 else ('B' if row['Profit'] <= get_threshold(row['Instrument']) else 'W'), axis=1)
-        grouped_data['Result'] = w_be_l
-        net_pnl = grouped_data['Profit'].sum()
-        total_trades = len(grouped_data)
-        self.total_trades = total_trades
-        winning_trades = len(grouped_data[grouped_data['Result'] == 'W'])
-        losing_trades = len(grouped_data[grouped_data['Result'] == 'L'])
-        break_even_trades = len(grouped_data[grouped_data['Result'] == 'B'])
-        win_rate = (winning_trades / total_trades) * 100 if total_trades > 0 else 0
-        loss_rate = (losing_trades / total_trades) * 100 if total_trades > 0 else 0
-        break_even_rate = (break_even_trades / total_trades) * 100 if total_trades > 0 else 0
-        avg_win = grouped_data[grouped_data['Result'] == 'W']['Profit'].mean()
-        avg_loss = grouped_data[grouped_data['Result'] == 'L']['Profit'].mean()
-        avg_rr = avg_win/np.abs(avg_loss)
-        self.first_stats_label.setText(f"Net Profit: ${net_pnl:.2f}")
-        self.second_stats_label.setText(f"Win Rate: {win_rate:.2f}%\nLoss Rate: {loss_rate:.2f}%\nB/e Rate: {break_even_rate:.2f}%")
-        self.third_stats_label.setText(f"Avg Win: ${avg_win:.2f} | Avg Loss: ${avg_loss:.2f} | Avg RR ratio: {avg_rr:.2f}")
-        self.fourth_stats_label.setText(f"Number of Trades: {total_trades}")
-
-    def plot_line_graph(self, data):
+    def updateStatsLabels(self, result):
+        stats = result.stats
+        self.total_trades = stats.total_trades
+        self.first_stats_label.setText(f"Net Profit: ${stats.net_pnl:.2f}\nExpectancy: ${stats.expectancy:.2f}")
+        self.second_stats_label.setText(f"Win Rate: {stats.win_rate:.2f}%\nLoss Rate: {stats.loss_rate:.2f}%\nB/e Rate: {stats.break_even_rate:.2f}%")
+        self.third_stats_label.setText(f"Avg Win: ${stats.avg_win:.2f} | Avg Loss: ${stats.avg_loss:.2f} | Avg RR ratio: {stats.avg_rr:.2f}\nProfit Factor: {stats.profit_factor:.2f}")
+        self.fourth_stats_label.setText(f"Number of Trades: {stats.total_trades}\nMax Consecutive Wins: {stats.max_consecutive_wins} | Losses: {stats.max_consecutive_losses}" + result.drawdown_text)
+
+    def plot_line_graph(self, result):
         try:
-            self.clearLayout(self.first_graph_frame.layout())
-            data.loc[:, 'EntryT'] = pd.to_datetime(data['EntryT'])
-            cumulative_progress = data.groupby('EntryT')['Profit'].sum().cumsum()
-            fig, ax = plt.subplots()
-            fig.patch.set_facecolor('#F0F0F0')
-            ax.set_facecolor('#F0F0F0')
-            line, = ax.plot(cumulative_progress.index, cumulative_progress, color='black', label='Cumulative Profit', linewidth=0.4)
-            ax.scatter(cumulative_progress.index, cumulative_progress, color='black', s=6, zorder=5, label='Trades')
-            ax.grid(False)
-            ax.axhline(0, color='black', linestyle='--', linewidth=0.4, label='$0')
-            cursor = mplcursors.cursor(line, hover=True)
-            cursor.connect("add", lambda sel: sel.annotation.set_text(f"Date: {cumulative_progress.index[int(sel.index)].strftime('%m/%d - %H:%M')}\nProfit: {cumulative_progress.iloc[int(sel.index)]:.2f}"))
-            cursor.connect("add", lambda sel: self.annotation_color(sel))
-            ax.xaxis.set_major_locator(mdates.MonthLocator())
-            ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
-            ax.xaxis.set_minor_locator(mdates.WeekdayLocator())
-            ax.set_title('')
-            ax.set_xlabel('')
-            ax.set_ylabel('')
-            ax.set_xticklabels([])
-            ax.set_yticklabels([])
-            ax.legend()
-            fig.tight_layout(pad=0, h_pad=0, w_pad=0)
-            ax.set_title("Profit Across Trades")
-            canvas = FigureCanvas(fig)
-            self.first_graph_frame.layout().addWidget(canvas)
+            self.line_x = x = result.line_x
+            self.line_y = y = result.line_y
+            shown = [y, [0.0]] + self.addLines(result)
+            self.set_limits(self.line_ax, x, np.concatenate(shown))
+            self.update_line_detail()
+            self.line_hover.set_items(result.line_tooltips, np.column_stack([x, y]))
+            handles = [artist for artist in (self.profit_line, self.trade_points, self.zero_line, self.target_line, self.threshold_line) if artist.get_visible()]
+            self.line_ax.legend(handles=handles)
+            self.line_canvas.draw_idle()
         except Exception as e:
             print(f"Error plotting graph: {e}")
 
-    def plot_trade_performance(self, data):
+    def update_line_detail(self):
+        # Only the points that can show up at the current zoom and width are handed to matplotlib
+        x_min, x_max = self.line_ax.get_xlim()
+        self.line_indices = downsample.minmax_indices(self.line_x, self.line_y, x_min, x_max, self.line_ax.bbox.width)
+        x = self.line_x[self.line_indices]
+        y = self.line_y[self.line_indices]
+        self.profit_line.set_data(x, y)
+        self.trade_points.set_offsets(np.column_stack([x, y]))
+        self.line_canvas.draw_idle()
+
+    def line_index_at(self, event):
+        # Nearest trade on screen from the full series, not just the drawn points, if it is within 10 px.
+        # Intraday trades share pixel columns, so every trade within 10 px of the cursor's x is a candidate.
+        if event.inaxes is not self.line_ax or event.xdata is None or not len(self.line_x):
+            return -1
+        (left, _), (right, _) = self.line_ax.transData.inverted().transform([(event.x - 10, event.y),
+                                                                             (event.x + 10, event.y)])
+        first = int(np.searchsorted(self.line_x, min(left, right)))
+        last = int(np.searchsorted(self.line_x, max(left, right), side='right'))
+        if first >= last:
+            return -1
+        candidates = np.arange(first, last)
+        points = self.line_ax.transData.transform(np.column_stack([self.line_x[first:last], self.line_y[first:last]]))
+        distances = np.hypot(points[:, 0] - event.x, points[:, 1] - event.y)
+        nearest = int(np.argmin(distances))
+        return candidates[nearest] if distances[nearest] <= 10 else -1
+
+    def addLines(self, result):
+        # Target and trailing threshold, returns the y values they put on screen
+        self.target_line.set_visible(result.target is not None)
+        self.threshold_line.set_visible(result.target is not None)
+        if result.target is None:
+            return []
+        self.target_line.set_ydata([result.target, result.target])
+        self.threshold_line.set_data(result.threshold_x, result.threshold_y)
+        return [[result.target], result.threshold_y]
+
+    def set_limits(self, ax, x, y, x_margin=0.02, y_margin=0.05):
+        if len(x):
+            x_pad = (x.max() - x.min()) * x_margin or 0.5
+            ax.set_xlim(x.min() - x_pad, x.max() + x_pad)
+        if len(y):
+            y_pad = (y.max() - y.min()) * y_margin or 1.0
+            ax.set_ylim(y.min() - y_pad, y.max() + y_pad)
+
+    def plot_trade_performance(self, result):
         try:
-            self.clearLayout(self.second_graph_frame.layout())
-            filtered_data = data.copy()
-            filtered_data.loc[:, 'EntryT'] = pd.to_datetime(filtered_data['EntryT'], errors='coerce')
-            if filtered_data.empty:
-                label = QLabel("No trades were made in this date range.")
-                self.second_graph_frame.layout().addWidget(label)
+            if result.trades.empty:
+                self.bar_canvas.hide()
+                self.no_trades_label.show()
                 return
-            grouped_data = filtered_data.groupby('EntryT').agg(Profit=('Profit', 'sum'), Qty=('Qty', 'sum'), LorS=('LorS', 'first'), Account=('Account', 'first')).reset_index()
-            fig, ax = plt.subplots(figsize=(6, 4))
-            fig.patch.set_facecolor('#F0F0F0')
-            ax.set_facecolor('#F0F0F0')
-            bars = ax.bar(grouped_data.index, grouped_data['Profit'], color=np.where(grouped_data['Profit'] > 0, 'green', 'red'))
-            cursor = mplcursors.cursor(bars, hover=True)
-            cursor.connect("add", lambda sel: self.annotate_bar(sel, grouped_data))
-            fig.canvas.mpl_connect('button_press_event', lambda event: self.on_click(event, bars, grouped_data))
-            ax.set_title('Trade Performance')
-            ax.set_xlabel('')
-            ax.set_ylabel('')
-            ax.axhline(0, color='grey', linewidth=0.8)
-            plt.tight_layout()
-            canvas = FigureCanvas(fig)
-            self.second_graph_frame.layout().addWidget(canvas)
+            self.no_trades_label.hide()
+            self.bar_canvas.show()
+            self.bar_views = result.bar_views
+            self.draw_bars()
         except Exception as e:
             print(f"Error plotting trade performance: {e}")
 
-    def on_click(self, event, bars, grouped_data):
-        for i, bar in enumerate(bars):
-            if bar.contains(event)[0]:
-                selected_data = grouped_data.iloc[i]
-                trade_id = f"{selected_data['Account']}_{selected_data['EntryT']}"
-                sanitized_trade_id = re.sub(r'[<>:"/\\|?*]', '_', trade_id)
-                if sanitized_trade_id in self.screenshots:
-                    self.show_screenshot(self.screenshots[sanitized_trade_id])
-                else:
-                    self.prompt_add_screenshot(sanitized_trade_id, selected_data)
-                break
-
-    def annotate_bar(self, sel, grouped_data):
-        sel.annotation.set_text(
-            f"Date: {pd.to_datetime(grouped_data.iloc[sel.index]['EntryT']).strftime('%m/%d - %H:%M')}\n" +
-            f"RR: {grouped_data.iloc[sel.index]['Profit']:.2f}\n" +
-            f"Qty: {grouped_data.iloc[sel.index]['Qty']}\n" +
-            f"LorS: {grouped_data.iloc[sel.index]['LorS']}\n" +
-            f"Account: {grouped_data.iloc[sel.index]['Account']}"
-        )
-        sel.annotation.get_bbox_patch().set(fc='black', alpha=0.6)
-        sel.annotation.get_bbox_patch().set_edgecolor('none')
-        sel.annotation.set_color('white')
+    def update_aggregation(self, resized=False):
+        # A resize only matters to Auto, which may now fit a finer or need a coarser level
+        if self.bar_views and not (resized and self.aggregation_comboBox.currentText() != 'Auto'):
+            self.draw_bars()
+
+    def auto_aggregation(self):
+        # Finest level that still leaves a few pixels per bar at the chart's current width
+        max_bars = max(self.bar_ax.bbox.width / 4, 1)
+        for level in account_summary.aggregation_levels:
+            if len(self.bar_views[level][0]) <= max_bars:
+                return level
+        return account_summary.aggregation_levels[-1]
+
+    def draw_bars(self):
+        level = self.aggregation_comboBox.currentText()
+        self.bar_level = level = self.auto_aggregation() if level == 'Auto' else level
+        grouped_data, tooltips = self.bar_views[level]
+        profit = grouped_data['Profit'].to_numpy(dtype='float64')
+        x = np.arange(len(profit))
+        half_width = self.bar_width / 2
+        verts = np.zeros((len(profit), 4, 2))
+        verts[:, :2, 0] = (x - half_width)[:, None]
+        verts[:, 2:, 0] = (x + half_width)[:, None]
+        verts[:, 1, 1] = verts[:, 2, 1] = profit
+        self.bars.set_verts(verts)
+        self.bars.set_facecolor(np.where((profit > 0)[:, None], to_rgba('green'), to_rgba('red')))
+        self.bar_heights = profit
+        self.bar_data = grouped_data
+        self.bar_hover.set_items(tooltips, np.column_stack([x, profit]))
+        self.bar_ax.set_title('Trade Performance' if level == 'Trade' else f'Trade Performance by {level}')
+        self.set_limits(self.bar_ax, np.array([-0.4, len(profit) - 0.6]), np.concatenate([profit, [0.0]]), x_margin=0)
+        self.bar_canvas.draw_idle()
+
+    def bar_index_at(self, event):
+        # Bar i covers x in [i - width/2, i + width/2] and y between 0 and its profit, -1 when no bar is hit
+        if event.inaxes is not self.bar_ax or event.xdata is None:
+            return -1
+        i = int(round(event.xdata))
+        if not 0 <= i < len(self.bar_heights) or abs(event.xdata - i) > self.bar_width / 2:
+            return -1
+        height = self.bar_heights[i]
+        if not min(0.0, height) <= event.ydata <= max(0.0, height):
+            return -1
+        return i
+
+    def on_click(self, event):
+        # Screenshots belong to single trades, aggregated bars have none
+        i = self.bar_index_at(event)
+        if i < 0 or self.bar_level != 'Trade':
+            return
+        selected_data = self.bar_data.iloc[i]
+        trade_id = f"{selected_data['Account']}_{selected_data['EntryT']}"
+        sanitized_trade_id = re.sub(r'[<>:"/\\|?*]', '_', trade_id)
+        if sanitized_trade_id in self.screenshots:
+            self.show_screenshot(self.screenshots[sanitized_trade_id])
+        else:
+            self.prompt_add_screenshot(sanitized_trade_id, selected_data)
 
     def prompt_add_screenshot(self, trade_id, trade_info):
         dialog = ScreenshotPrompt(trade_info)
@@ -357,6 +543,12 @@ class ApexDataWidget(QDialog):
                 self.screenshots[trade_id] = upload_dialog.screenshot_path
                 self.save_screenshots()
 
+    def prefetch_screenshots(self, limit=32):
+        # Decode the account's latest screenshots in the background so opening one is a cache hit
+        prefix = re.sub(r'[<>:"/\\|?*]', '_', f"{self.selected_account}_")
+        paths = [path for trade_id, path in self.screenshots.items() if trade_id.startswith(prefix)]
+        screenshot_cache.get_service().prefetch(paths[-limit:])
+
     def show_screenshot(self, screenshot_path):
         dialog = ScreenshotDisplay(screenshot_path)
         dialog.exec_()
@@ -374,33 +566,22 @@ class ApexDataWidget(QDialog):
         except Exception as e:
             print(f"Error printing bar info: {e}")
 
-    def plot_calendar(self, data):
+    def plot_calendar(self, daily):
         try:
-            for i in reversed(range(self.third_graph_frame.layout().count())):
-                widget_to_remove = self.third_graph_frame.layout().itemAt(i).widget()
-                if widget_to_remove:
-                    self.third_graph_frame.layout().removeWidget(widget_to_remove)
-                    widget_to_remove.setParent(None)
-            self.calendar = CustomCalendar(parent=None)
-            self.calendar.setGeometry(0, 0, 600, 400)
-            self.calendar.account_data = data
-            self.update_calendar(data)
-            self.third_graph_frame.layout().addWidget(self.calendar)
-            self.show()
+            self.update_calendar(daily)
         except Exception as e:
             print(f"Error plotting calendar: {e}")
 
-    def update_calendar(self, data):
-        data = data.groupby('EntryT').agg({'Profit': 'sum', 'LorS': 'first'}).reset_index()
-        data['EntryT'] = pd.to_datetime(data['EntryT'])
-        data['Date'] = data['EntryT'].dt.date
-        grouped_data = data.groupby('Date').agg({'Profit': 'sum', 'EntryT': 'count'}).rename(columns={'EntryT': 'Trades'}).reset_index()
-        for index, row in grouped_data.iterrows():
-            date = row['Date']
-            if date.month == self.current_date.month() and date.year == self.current_date.year():
-                day = date.day
-                text = f"Profit: {row['Profit']}\nTrades: {row['Trades']}"
-                self.calendar.setText(day, text)
+    def update_calendar(self, daily):
+        # The calendar widgets stay in place (and on the month they show), only their data is replaced
+        self.calendar.set_daily(daily)
+        self.heatmap.set_daily(daily)
+
+    def change_calendar_mode(self, index):
+        # Index 0 is the label calendar, the others the painted heatmap by month or by year
+        self.calendar_stack.setCurrentIndex(min(index, 1))
+        if index:
+            self.heatmap.setMode('Month' if index == 1 else 'Year')
 
     def open_settings_widget(self):
         if not self.accountselection_comboBox.currentIndex() == -1:
@@ -413,16 +594,32 @@ class ApexDataWidget(QDialog):
             self.settings_widget.show()
             self.setEnabled(False)
 
+    def open_portfolio_overview(self):
+        from PortfolioOverviewWidget import PortfolioOverviewWidget
+        try:
+            start_date = end_date = None
+            if self.first_dateEdit.isEnabled():
+                start_date, end_date = self.selected_range()
+            self.portfolio_widget = PortfolioOverviewWidget(self.summaries, self.data_settings, self.apex_accounts, start_date, end_date)
+            self.portfolio_widget.show()
+        except Exception as e:
+            print(f"Error opening portfolio overview: {e}")
+
     def enable_apex_data_widget(self):
         self.setEnabled(True)
 
     def update_graph(self):
+        self.update_drawdowns()
         self.display_selected_account()
 
-    def annotation_color(self, sel):
-        sel.annotation.get_bbox_patch().set(fc='black', alpha=0.6)
-        sel.annotation.get_bbox_patch().set_edgecolor('none')
-        sel.annotation.set_color('white')
+    def done(self, result):
+        # Esc and reject() hide the dialog without a closeEvent
+        self.stop_analytics()
+        super(ApexDataWidget, self).done(result)
+
+    def closeEvent(self, event):
+        self.stop_analytics()
+        super(ApexDataWidget, self).closeEvent(event)
 
     def mousePressEvent(self, event):
         if event.button() == QtCore.Qt.LeftButton:
@@ -436,11 +633,3 @@ class ApexDataWidget(QDialog):
     def mouseReleaseEvent(self, event):
         if event.button() == QtCore.Qt.LeftButton:
             self._is_moving = False
-
-    def clearLayout(self, layout):
-        plt.close()
-        for i in reversed(range(layout.count())):
-            widget_to_remove = layout.itemAt(i).widget()
-            if widget_to_remove:
-                layout.removeWidget(widget_to_remove)
-                widget_to_remove.setParent(None)
@@ -1,13 +1,17 @@
 import sys
+from startup_timing import timer as startup_timer
+# The import hook only goes in when the timing report was asked for
+if '--startup-timing' in sys.argv:
+    startup_timer.start()
 import pandas as pd
-from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTreeView, QAbstractItemView, QFileDialog, QMessageBox
-from PyQt5.QtCore import Qt, QPoint
+from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTreeView, QAbstractItemView, QFileDialog, QMessageBox, QComboBox, QDateEdit
+from PyQt5.QtCore import Qt, QPoint, QDate
 from PyQt5 import QtGui
-from PyQt5.QtGui import QStandardItemModel, QStandardItem
-import os
-from functions import update_with_new_data
+import trade_store
+from TradeTableModel import TradeTableModel
 from ManageDataWidget import ManageDataWidget
-from ApexDataWidget import ApexDataWidget
+# ApexDataWidget pulls in matplotlib and is only imported once the Apex view is opened
+startup_timer.mark("Modules imported")
 
 
 class MainWindow(QMainWindow):
@@ -19,6 +23,10 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("JournalTrade")
         self.setGeometry(100, 100, 800, 200)
 
+        self._first_paint_done = False
+        self.manage_widget = None
+        self.apex_widget = None
+
         # Variables to store the mouse position
         self._is_dragging = False
         self._drag_start_position = QPoint()
@@ -71,6 +79,9 @@ class MainWindow(QMainWindow):
         self.bottom_frame = QWidget()
         self.bottom_layout = QVBoxLayout(self.bottom_frame)
 
+        self.setup_filter_bar()
+        self.bottom_layout.addWidget(self.filter_frame)
+
         self.tree_view = QTreeView()
         self.load_data_into_tree_view()
 
@@ -87,9 +98,19 @@ class MainWindow(QMainWindow):
                 border: 2px solid black;
             }
         """)
+        startup_timer.mark("Main window built")
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._first_paint_done:
+            self._first_paint_done = True
+            startup_timer.mark("First paint")
+            startup_timer.stop()
+            if '--startup-timing' in sys.argv:
+                print(startup_timer.report())
 
     def check_data(self):
-        if not os.path.exists('resources/to_use_data.csv'):
+        if not trade_store.has_data():
             QMessageBox.warning(self, "File Not Found", "To run the app you need to enter a csv file from "
                                                         "NinjaTrader. On NinjaTrader, select the following "
                                                         "columns:\n*Instrument,"
@@ -99,32 +120,133 @@ class MainWindow(QMainWindow):
             if not file_path:
                 sys.exit()
             else:
-                update_with_new_data(file_path)
-
+                from functions import update_with_new_data
+                try:
+                    update_with_new_data(file_path)
+                except ValueError as e:
+                    QMessageBox.warning(self, "Import failed", str(e))
+                    sys.exit()
+
+
+    def setup_filter_bar(self):
+        self.filter_frame = QWidget()
+        self.filter_layout = QHBoxLayout(self.filter_frame)
+        self.account_filter_comboBox = QComboBox()
+        self.instrument_filter_comboBox = QComboBox()
+        self.start_filter_dateEdit = QDateEdit()
+        self.start_filter_dateEdit.setCalendarPopup(True)
+        self.end_filter_dateEdit = QDateEdit()
+        self.end_filter_dateEdit.setCalendarPopup(True)
+        self.pnl_filter_comboBox = QComboBox()
+        self.pnl_filter_comboBox.addItem("All P&L", None)
+        self.pnl_filter_comboBox.addItem("Winners", 1)
+        self.pnl_filter_comboBox.addItem("Losers", -1)
+        for widget in (self.account_filter_comboBox, self.instrument_filter_comboBox, self.start_filter_dateEdit,
+                       self.end_filter_dateEdit, self.pnl_filter_comboBox):
+            self.filter_layout.addWidget(widget)
+        self.filter_layout.addStretch(1)
+        self.account_filter_comboBox.currentIndexChanged.connect(self.apply_filters)
+        self.instrument_filter_comboBox.currentIndexChanged.connect(self.apply_filters)
+        self.start_filter_dateEdit.dateChanged.connect(self.apply_filters)
+        self.end_filter_dateEdit.dateChanged.connect(self.apply_filters)
+        self.pnl_filter_comboBox.currentIndexChanged.connect(self.apply_filters)
+        self.filter_dates_set = False
+
+    def update_filter_options(self):
+        widgets = (self.account_filter_comboBox, self.instrument_filter_comboBox, self.start_filter_dateEdit,
+                   self.end_filter_dateEdit)
+        for widget in widgets:
+            widget.blockSignals(True)
+        for comboBox, column, label in ((self.account_filter_comboBox, 'Account', "All accounts"),
+                                        (self.instrument_filter_comboBox, 'Instrument', "All instruments")):
+            selected = comboBox.currentData()
+            comboBox.clear()
+            comboBox.addItem(label, None)
+            for value in sorted(self.trades[column].dropna().unique()):
+                comboBox.addItem(str(value), str(value))
+            comboBox.setCurrentIndex(max(comboBox.findData(selected), 0))
+        entry_times = self.trades['EntryT'].dropna()
+        if not entry_times.empty:
+            # A bound the user has moved stays where it is, one left at the edge follows the new data
+            start_narrowed, end_narrowed = self.date_filter_bounds()
+            start_date, end_date = self.start_filter_dateEdit.date(), self.end_filter_dateEdit.date()
+            first_date, last_date = entry_times.min(), entry_times.max()
+            for dateEdit in (self.start_filter_dateEdit, self.end_filter_dateEdit):
+                dateEdit.setDateRange(QDate(first_date.year, first_date.month, first_date.day),
+                                      QDate(last_date.year, last_date.month, last_date.day))
+            self.start_filter_dateEdit.setDate(start_date if start_narrowed else self.start_filter_dateEdit.minimumDate())
+            self.end_filter_dateEdit.setDate(end_date if end_narrowed else self.end_filter_dateEdit.maximumDate())
+            self.filter_dates_set = True
+        for widget in widgets:
+            widget.blockSignals(False)
+
+    def date_filter_bounds(self):
+        # (start narrowed, end narrowed): whether each date edit was moved off the edge of the data's range
+        if not self.filter_dates_set:
+            return False, False
+        return (self.start_filter_dateEdit.date() > self.start_filter_dateEdit.minimumDate(),
+                self.end_filter_dateEdit.date() < self.end_filter_dateEdit.maximumDate())
+
+    def apply_filters(self):
+        model = self.tree_view.model()
+        if not isinstance(model, TradeTableModel):
+            return
+        account = self.account_filter_comboBox.currentData()
+        instrument = self.instrument_filter_comboBox.currentData()
+        # Bounds left at the edge of the range filter nothing, so trades without an entry time stay listed
+        start_narrowed, end_narrowed = self.date_filter_bounds()
+        start_date = end_date = None
+        if start_narrowed:
+            start_date = pd.to_datetime(self.start_filter_dateEdit.date().toString("yyyy-MM-dd"))
+        if end_narrowed:
+            end_date = pd.to_datetime(self.end_filter_dateEdit.date().toString("yyyy-MM-dd")) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+        model.set_filter(accounts=None if account is None else [account],
+                         instruments=None if instrument is None else [instrument],
+                         start=start_date, end=end_date, pnl_sign=self.pnl_filter_comboBox.currentData())
 
     def load_data_into_tree_view(self):
-        data = pd.read_csv('resources/to_use_data.csv')
-        model = QStandardItemModel()
-        model.setHorizontalHeaderLabels(data.columns.tolist())
-
-        for row in data.itertuples(index=False):
-            items = [QStandardItem(str(field)) for field in row]
-            model.appendRow(items)
-
-        self.tree_view.setModel(model)
-        self.tree_view.setAlternatingRowColors(True)
-        self.tree_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
-
-
-    def update_tree_view(self):
-        self.load_data_into_tree_view()
+        self.trades = trade_store.load_trades()
+        startup_timer.mark("Trades loaded")
+        self.show_trades_in_tree_view()
+
+    def show_trades_in_tree_view(self):
+        if not isinstance(self.tree_view.model(), TradeTableModel):
+            self.tree_view.setModel(TradeTableModel(self.trades, self.tree_view))
+            self.tree_view.setRootIsDecorated(False)
+            self.tree_view.setUniformRowHeights(True)
+            self.tree_view.setAlternatingRowColors(True)
+            self.tree_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+            # Keep the journal order until a header is clicked; sorting is done on the arrays by the model
+            self.tree_view.header().setSortIndicator(-1, Qt.AscendingOrder)
+            self.tree_view.setSortingEnabled(True)
+        else:
+            self.tree_view.model().set_trades(self.trades)
+        self.update_filter_options()
+        self.apply_filters()
+
+
+    def update_tree_view(self, result):
+        # Only the segments committed by this import are read back from the store
+        new_trades = trade_store.load_trades(segments=result.segments)
+        self.trades = trade_store.concat_trades([self.trades, new_trades])
+        self.show_trades_in_tree_view()
 
     def open_manage_data_widget(self):
+        # A dialog with an import in progress is brought back instead of being replaced mid-import
+        if self.manage_widget is not None and self.manage_widget.is_importing():
+            self.manage_widget.show()
+            self.manage_widget.raise_()
+            self.manage_widget.activateWindow()
+            return
         self.manage_widget = ManageDataWidget(parent=None)
         self.manage_widget.csv_uploaded.connect(self.update_tree_view)
         self.manage_widget.show()
 
     def open_apex_data_widget(self):
+        from ApexDataWidget import ApexDataWidget
+        # The previous view's analytics thread has to be stopped before the dialog is dropped
+        if self.apex_widget is not None:
+            self.apex_widget.close()
         self.apex_widget = ApexDataWidget(parent=None)
         self.apex_widget.show()
 
@@ -1,11 +1,61 @@
 from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtCore import pyqtSignal
 import pandas as pd
-from functions import update_with_new_data
+import threading
+import atexit
+import trade_store
+
+
+# Running imports are owned here until their thread has finished, so neither the thread nor its staged
+# segments depend on the dialog that started them staying referenced
+running_imports = set()
+
+
+def cancel_running_imports():
+    # Cancelled imports roll their staged segments back before the thread ends
+    for thread, worker in list(running_imports):
+        worker.cancel()
+        thread.quit()
+        thread.wait()
+
+
+atexit.register(cancel_running_imports)
+
+
+class ImportWorker(QtCore.QObject):
+    progress = pyqtSignal(int, int)  # rows parsed, rows inserted
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, file_names):
+        super().__init__()
+        self.file_names = file_names
+        self._cancel_requested = threading.Event()
+
+    def run(self):
+        # functions is only needed once something is imported, so it stays out of the app's startup
+        from functions import update_with_new_data, import_broker_files, ImportCancelled
+        try:
+            if len(self.file_names) == 1:
+                result = update_with_new_data(self.file_names[0], progress=self.progress.emit,
+                                              is_cancelled=self._cancel_requested.is_set)
+            else:
+                result = import_broker_files(self.file_names, progress=self.progress.emit,
+                                             is_cancelled=self._cancel_requested.is_set)
+        except ImportCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit(result)
+
+    def cancel(self):
+        self._cancel_requested.set()
 
 
 class ManageDataWidget(QtWidgets.QDialog):
-    csv_uploaded = pyqtSignal()
+    csv_uploaded = pyqtSignal(object)
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Manage Account Data")
@@ -25,27 +75,124 @@ class ManageDataWidget(QtWidgets.QDialog):
         self.hide_button = QtWidgets.QPushButton("Hide Account", clicked=self.hide_accounts)
         self.manageDataLayout.addWidget(self.hide_button)
 
-        self.update_data_button = QtWidgets.QPushButton("Upload Broker CSV File", clicked=self.open_file_dialog)
+        self.update_data_button = QtWidgets.QPushButton("Upload Broker CSV File(s)", clicked=self.open_file_dialog)
         self.manageDataLayout.addWidget(self.update_data_button)
 
+        self.import_status_label = QtWidgets.QLabel("")
+        self.import_status_label.setWordWrap(True)
+        self.manageDataLayout.addWidget(self.import_status_label)
+
+        self.cancel_import_button = QtWidgets.QPushButton("Cancel Import", clicked=self.cancel_import)
+        self.cancel_import_button.setEnabled(False)
+        self.manageDataLayout.addWidget(self.cancel_import_button)
+
+        self.export_data_button = QtWidgets.QPushButton("Export Journal CSV", clicked=self.export_csv_dialog)
+        self.manageDataLayout.addWidget(self.export_data_button)
+
+        self.compact_data_button = QtWidgets.QPushButton("Compact Journal", clicked=self.compact_journal)
+        self.manageDataLayout.addWidget(self.compact_data_button)
+
         self.close_button = QtWidgets.QPushButton("Close", clicked=self.close)
         self.manageDataLayout.addWidget(self.close_button)
 
         self.oldPos = None
+        self.import_thread = None
+        self.import_worker = None
 
     def open_file_dialog(self):
         # Options for the file dialog
         options = QtWidgets.QFileDialog.Options()
         options |= QtWidgets.QFileDialog.DontUseNativeDialog
-        file_name, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Select a CSV file", "",
+        file_names, _ = QtWidgets.QFileDialog.getOpenFileNames(self, "Select one or more CSV files", "",
+                                                               "CSV Files (*.csv);;All Files (*)", options=options)
+        if file_names:
+            self.start_import(file_names)
+
+    def start_import(self, file_names):
+        # The import runs on a worker thread so the event loop keeps running during large imports
+        self.import_thread = QtCore.QThread()
+        self.import_worker = ImportWorker(file_names)
+        self.import_worker.moveToThread(self.import_thread)
+        self.import_thread.started.connect(self.import_worker.run)
+        self.import_worker.progress.connect(self.on_import_progress)
+        self.import_worker.finished.connect(self.on_import_finished)
+        self.import_worker.failed.connect(self.on_import_failed)
+        self.import_worker.cancelled.connect(self.on_import_cancelled)
+        for signal in (self.import_worker.finished, self.import_worker.failed, self.import_worker.cancelled):
+            signal.connect(self.import_thread.quit)
+        self.import_thread.finished.connect(self.on_import_thread_finished)
+        entry = (self.import_thread, self.import_worker)
+        running_imports.add(entry)
+        self.import_thread.finished.connect(lambda: running_imports.discard(entry))
+        self.update_data_button.setEnabled(False)
+        self.compact_data_button.setEnabled(False)
+        self.cancel_import_button.setEnabled(True)
+        self.import_status_label.setText("Importing...")
+        self.import_thread.start()
+
+    def is_importing(self):
+        return self.import_thread is not None
+
+    def cancel_import(self):
+        if self.import_worker is not None:
+            self.import_worker.cancel()
+            self.import_status_label.setText("Cancelling...")
+
+    def on_import_progress(self, rows_parsed, rows_inserted):
+        self.import_status_label.setText(f"Parsed {rows_parsed} rows, {rows_inserted} new")
+
+    def on_import_finished(self, result):
+        # Batch imports also list every file with its timing, or the error it failed with
+        files = getattr(result, 'files', [])
+        lines = [f"Imported {result.inserted} new trades, skipped {result.skipped}"]
+        failed = sum(1 for report in files if report.error)
+        if failed:
+            lines[0] += f" ({failed} of {len(files)} files failed)"
+        from functions import describe_report
+        lines += [describe_report(report) for report in files]
+        self.import_status_label.setText("\n".join(lines))
+        self.reload_accounts()
+        if result.inserted:
+            self.csv_uploaded.emit(result)  # Only emitted once the import is committed
+
+    def on_import_failed(self, error):
+        self.import_status_label.setText("Import failed")
+        print(f"Error processing file: {error}")
+
+    def on_import_cancelled(self):
+        self.import_status_label.setText("Import cancelled, nothing was saved")
+
+    def on_import_thread_finished(self):
+        self.import_worker.deleteLater()
+        self.import_thread.deleteLater()
+        self.import_worker = None
+        self.import_thread = None
+        self.update_data_button.setEnabled(True)
+        self.compact_data_button.setEnabled(True)
+        self.cancel_import_button.setEnabled(False)
+
+    def closeEvent(self, event):
+        # Only ask a running import to stop: it rolls back on its own thread, and running_imports keeps the
+        # thread alive until then, so the GUI never waits on a file still being parsed
+        self.cancel_import()
+        event.accept()
+
+    def export_csv_dialog(self):
+        options = QtWidgets.QFileDialog.Options()
+        options |= QtWidgets.QFileDialog.DontUseNativeDialog
+        file_name, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export journal as CSV", trade_store.legacy_csv_path,
                                                              "CSV Files (*.csv);;All Files (*)", options=options)
         if file_name:
             try:
-                update_with_new_data(file_name)
-                self.csv_uploaded.emit()  # Emit the signal after processing
-                self.reload_accounts()
+                trade_store.export_csv(file_name)
             except Exception as e:
-                print(f"Error processing file: {e}")
+                print(f"Error exporting file: {e}")
+
+    def compact_journal(self):
+        try:
+            trade_store.compact()
+        except Exception as e:
+            print(f"Error compacting journal: {e}")
 
     def mousePressEvent(self, event):
         if event.button() == QtCore.Qt.LeftButton:
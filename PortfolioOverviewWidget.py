@@ -0,0 +1,43 @@
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableView, QAbstractItemView
+from TradeTableModel import TradeTableModel
+import portfolio
+
+
+class PortfolioOverviewWidget(QDialog):
+    def __init__(self, summaries, data_settings, accounts=None, start=None, end=None, parent=None):
+        super(PortfolioOverviewWidget, self).__init__(parent)
+        self.setWindowTitle("Apex Portfolio Overview")
+        self.setGeometry(120, 120, 1400, 450)
+        self.summaries = summaries
+        self.data_settings = data_settings
+        self.accounts = accounts
+        self.setupUi()
+        self.update_overview(start, end)
+
+    def setupUi(self):
+        layout = QVBoxLayout(self)
+        top_layout = QHBoxLayout()
+        self.range_label = QLabel(self)
+        self.close_button = QPushButton("Close", clicked=self.close)
+        top_layout.addWidget(self.range_label)
+        top_layout.addStretch(1)
+        top_layout.addWidget(self.close_button)
+        self.table_view = QTableView(self)
+        self.table_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table_view.setSortingEnabled(True)
+        self.model = TradeTableModel(parent=self)
+        self.table_view.setModel(self.model)
+        layout.addLayout(top_layout)
+        layout.addWidget(self.table_view)
+
+    def update_overview(self, start=None, end=None):
+        summary = portfolio.evaluate_portfolio(self.summaries, self.data_settings, self.accounts, start, end)
+        numeric_columns = summary.select_dtypes('number').columns
+        summary[numeric_columns] = summary[numeric_columns].round(2)
+        self.model.set_trades(summary.reset_index())
+        self.table_view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table_view.resizeColumnsToContents()
+        start_text = start.strftime('%Y-%m-%d') if start is not None else 'first trade'
+        end_text = end.strftime('%Y-%m-%d') if end is not None else 'last trade'
+        self.range_label.setText(f"{len(summary)} accounts, {start_text} to {end_text}")
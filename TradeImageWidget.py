@@ -1,11 +1,11 @@
 import os
 import json
-from PyQt5 import QtGui
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import Qt, QPoint
 import pandas as pd
 import shutil
 import re
+import screenshot_cache
 
 def sanitize_filename(filename):
     return re.sub(r'[<>:"/\\|?*]', '_', filename)
@@ -196,10 +196,19 @@ class ScreenshotDisplay(QDialog):
 
         layout = QVBoxLayout()
 
-        label = QLabel()
-        pixmap = QtGui.QPixmap(self.screenshot_path)
-        label.setPixmap(pixmap)
-        layout.addWidget(label)
+        # The screenshot is decoded scaled to the dialog off the GUI thread, or comes straight from the cache
+        self.label = QLabel("Loading screenshot...")
+        self.label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.label)
+        service = screenshot_cache.get_service()
+        self.screenshot_key, pixmap = service.request(self.screenshot_path)
+        if self.screenshot_key is None:
+            self.label.setText("Screenshot file not found")
+        elif pixmap is not None:
+            self.label.setPixmap(pixmap)
+        else:
+            service.loaded.connect(self.on_screenshot_loaded)
+            self.finished.connect(lambda result: service.loaded.disconnect(self.on_screenshot_loaded))
 
         close_button = QPushButton("Close")
         close_button.clicked.connect(self.close)
@@ -207,6 +216,14 @@ class ScreenshotDisplay(QDialog):
 
         self.setLayout(layout)
 
+    def on_screenshot_loaded(self, key, pixmap):
+        if key != self.screenshot_key:
+            return
+        if pixmap.isNull():
+            self.label.setText("Screenshot could not be loaded")
+        else:
+            self.label.setPixmap(pixmap)
+
     def center(self):
         frame_geom = self.frameGeometry()
         parent_pos = self.parent().frameGeometry().center() if self.parent() else QDesktopWidget().availableGeometry().center()
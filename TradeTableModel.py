@@ -0,0 +1,181 @@
+import numpy as np
+import pandas as pd
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+
+class TradeTableModel(QAbstractTableModel):
+    # Serves cells straight from the trade columns, nothing is formatted until the view asks for it.
+    # Sorting and filtering never touch Qt per row: they produce self._order, the permutation of
+    # source rows the view walks through.
+    fetch_batch_size = 1000
+    time_format = '%Y-%m-%d %H:%M:%S'
+
+    def __init__(self, trades=None, parent=None):
+        super(TradeTableModel, self).__init__(parent)
+        self._headers = []
+        self._columns = []
+        self._order = np.empty(0, dtype='int64')
+        self._mask = None
+        self._sort_column = -1
+        self._sort_order = Qt.AscendingOrder
+        self._sorted_rows = {}
+        self._filters = {}
+        self._row_count = 0
+        self._loaded_rows = 0
+        if trades is not None:
+            self.set_trades(trades)
+
+    def set_trades(self, trades):
+        self.beginResetModel()
+        self._headers = trades.columns.tolist()
+        self._columns = [self.column_values(trades[column]) for column in self._headers]
+        self._sorted_rows = {}
+        self._mask = self.filter_mask(**self._filters)
+        self._order = self.ordered_rows()
+        self._reset_paging()
+        self.endResetModel()
+
+    def _reset_paging(self):
+        self._row_count = len(self._order)
+        self._loaded_rows = min(self.fetch_batch_size, self._row_count)
+
+    def source_rows(self):
+        return self._order
+
+    def column(self, name):
+        return self._columns[self._headers.index(name)]
+
+    def sort_key(self, column):
+        kind, values, categories = self._columns[column]
+        if kind == 'category':
+            # Rank of each category label, so categories sort alphabetically rather than by code
+            ranks = np.empty(len(categories) + 1, dtype='int64')
+            ranks[:-1] = np.argsort(np.argsort(categories.astype(str), kind='stable'), kind='stable')
+            ranks[-1] = -1
+            return ranks[values]
+        if kind == 'object':
+            return values.astype(str)
+        return values
+
+    def sorted_rows(self, column):
+        # One full argsort per column, cached; every later sort or filter change only gathers from it
+        if column not in self._sorted_rows:
+            self._sorted_rows[column] = np.argsort(self.sort_key(column), kind='stable')
+        return self._sorted_rows[column]
+
+    def ordered_rows(self):
+        row_count = len(self._columns[0][1]) if self._columns else 0
+        if 0 <= self._sort_column < len(self._columns):
+            rows = self.sorted_rows(self._sort_column)
+            if self._sort_order == Qt.DescendingOrder:
+                rows = rows[::-1]
+        else:
+            rows = np.arange(row_count)
+        if self._mask is not None:
+            rows = rows[self._mask[rows]]
+        return rows
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.beginResetModel()
+        self._sort_column = column
+        self._sort_order = order
+        self._order = self.ordered_rows()
+        self._reset_paging()
+        self.endResetModel()
+
+    def set_filter(self, accounts=None, instruments=None, start=None, end=None, pnl_sign=None):
+        # accounts/instruments: iterables of names, start/end: anything pd.Timestamp accepts,
+        # pnl_sign: 1 for winners, -1 for losers, None for both
+        self.beginResetModel()
+        self._filters = dict(accounts=accounts, instruments=instruments, start=start, end=end, pnl_sign=pnl_sign)
+        self._mask = self.filter_mask(**self._filters)
+        self._order = self.ordered_rows()
+        self._reset_paging()
+        self.endResetModel()
+
+    def filter_mask(self, accounts=None, instruments=None, start=None, end=None, pnl_sign=None):
+        if not self._columns:
+            return None
+        mask = np.ones(len(self._columns[0][1]), dtype=bool)
+        filtered = False
+        for name, selected in (('Account', accounts), ('Instrument', instruments)):
+            if selected is not None and name in self._headers:
+                _, codes, categories = self.column(name)
+                selected_codes = np.flatnonzero(np.isin(categories, list(selected)))
+                mask &= np.isin(codes, selected_codes)
+                filtered = True
+        if 'EntryT' in self._headers:
+            _, entry_ns, _ = self.column('EntryT')
+            if start is not None:
+                mask &= entry_ns >= pd.Timestamp(start).value
+                filtered = True
+            if end is not None:
+                mask &= entry_ns <= pd.Timestamp(end).value
+                filtered = True
+        if pnl_sign is not None and 'Profit' in self._headers:
+            _, profit, _ = self.column('Profit')
+            mask &= profit > 0 if pnl_sign > 0 else profit < 0
+            filtered = True
+        return mask if filtered else None
+
+    def column_values(self, series):
+        # (kind, values, categories): category codes, int64 nanoseconds or the raw numbers
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return 'category', series.cat.codes.to_numpy(), np.asarray(series.cat.categories, dtype=object)
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return 'time', series.to_numpy(dtype='datetime64[ns]').view('int64'), None
+        if pd.api.types.is_integer_dtype(series):
+            return 'int', series.to_numpy(), None
+        if pd.api.types.is_float_dtype(series):
+            return 'float', series.to_numpy(), None
+        return 'object', series.to_numpy(dtype=object), None
+
+    def format_value(self, column, row):
+        kind, values, categories = self._columns[column]
+        value = values[self._order[row]]
+        if kind == 'category':
+            return '' if value < 0 else str(categories[value])
+        if kind == 'time':
+            return '' if value == np.iinfo('int64').min else pd.Timestamp(int(value)).strftime(self.time_format)
+        if kind == 'int':
+            return str(int(value))
+        if kind == 'float':
+            return '' if np.isnan(value) else str(float(value))
+        return str(value)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._loaded_rows
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        return self.format_value(index.column(), index.row())
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self._headers[section]
+        return str(section + 1)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._loaded_rows < self._row_count
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        rows_to_fetch = min(self.fetch_batch_size, self._row_count - self._loaded_rows)
+        if rows_to_fetch <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded_rows, self._loaded_rows + rows_to_fetch - 1)
+        self._loaded_rows += rows_to_fetch
+        self.endInsertRows()
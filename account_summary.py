@@ -0,0 +1,167 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+import instruments
+import trade_store
+
+
+summary_file_name = 'summary.pkl'
+summary_version = 4
+# Bar levels of the trade performance chart, finest first
+aggregation_levels = ['Trade', 'Day', 'Week', 'Month']
+period_freqs = {'Week': 'W', 'Month': 'M'}
+
+
+def trade_rollup(fills):
+    # One row per trade: the fills of an account that share an EntryT
+    if fills.empty:
+        return pd.DataFrame(columns=['Account', 'EntryT', 'ExitT', 'Profit', 'Qty', 'LorS', 'Instrument', 'RootCode'])
+    trades = fills.groupby(['Account', 'EntryT'], observed=True, sort=True).agg(
+        ExitT=('ExitT', 'max'), Profit=('Profit', 'sum'), Qty=('Qty', 'sum'), LorS=('LorS', 'first'),
+        Instrument=('Instrument', 'first')).reset_index()
+    trades['RootCode'] = instruments.root_codes(trades['Instrument'])
+    return trades
+
+
+def daily_rollup(trades):
+    dates = trades['EntryT'].dt.normalize().rename('Date')
+    return trades.groupby(dates).agg(Profit=('Profit', 'sum'), Trades=('Profit', 'size')).reset_index()
+
+
+def time_values(series):
+    return series.to_numpy(dtype='datetime64[ns]').view('int64')
+
+
+def period_starts(dates, freq):
+    # Start of the week (Monday) or month each date falls in
+    return time_values(dates.dt.to_period(freq).dt.start_time)
+
+
+class AccountSummary:
+    # trades stays sorted by EntryT and daily by Date, so date ranges are two binary searches away
+    def __init__(self, account, trades):
+        self.account = account
+        self.trades = trades.reset_index(drop=True)
+        self.daily = daily_rollup(self.trades)
+        self.entry_ns = time_values(self.trades['EntryT'])
+        self.date_ns = time_values(self.daily['Date'])
+        # Period start of every daily row, per aggregation level
+        self.period_ns = {'Day': self.date_ns}
+        for level, freq in period_freqs.items():
+            self.period_ns[level] = period_starts(self.daily['Date'], freq)
+
+    def range_slice(self, values, start, end):
+        lo = 0 if start is None else np.searchsorted(values, pd.Timestamp(start).value, side='left')
+        hi = len(values) if end is None else np.searchsorted(values, pd.Timestamp(end).value, side='right')
+        return slice(lo, hi)
+
+    def between(self, start=None, end=None):
+        # (trades, daily) with EntryT/Date inside [start, end], as positional slices of the rollups
+        trades = self.trades.iloc[self.range_slice(self.entry_ns, start, end)]
+        day_start = None if start is None else pd.Timestamp(start).normalize()
+        daily = self.daily.iloc[self.range_slice(self.date_ns, day_start, end)]
+        return trades, daily
+
+    def period_rollup(self, daily, level):
+        # Day/Week/Month bars for a slice of self.daily. The slice's days are summed per period with one
+        # reduceat, so periods cut by the range only count the days inside it.
+        positions = daily.index.to_numpy()
+        period_ns = self.period_ns[level][positions]
+        starts = np.flatnonzero(np.diff(period_ns, prepend=-1))
+        return pd.DataFrame({
+            'Date': period_ns[starts].view('datetime64[ns]'),
+            'Profit': np.add.reduceat(self.daily['Profit'].to_numpy()[positions], starts),
+            'Trades': np.add.reduceat(self.daily['Trades'].to_numpy()[positions], starts),
+        })
+
+    def merge(self, new_trades):
+        # Fills that land on an existing EntryT are folded into that trade, the rest are inserted in order
+        trades = trade_store.concat_trades([self.trades, new_trades])
+        if trades['EntryT'].duplicated().any():
+            trades = trades.groupby('EntryT', sort=True).agg(
+                Account=('Account', 'first'), ExitT=('ExitT', 'max'), Profit=('Profit', 'sum'), Qty=('Qty', 'sum'),
+                LorS=('LorS', 'first'), Instrument=('Instrument', 'first'),
+                RootCode=('RootCode', 'first')).reset_index()[self.trades.columns]
+        else:
+            trades = trades.sort_values('EntryT', kind='stable')
+        return AccountSummary(self.account, trades)
+
+
+class SummaryCache:
+    # Per-account trade and daily rollups, persisted next to the trade store and caught up with
+    # new segments instead of being rebuilt from every fill
+    def __init__(self, summaries=None, rows=0, segments=()):
+        self.version = summary_version
+        self.summaries = summaries or {}
+        self.rows = rows
+        self.segments = list(segments)
+
+    def get(self, account):
+        return self.summaries.get(account)
+
+    def accounts(self):
+        return list(self.summaries)
+
+    def update(self, fills):
+        rollup = trade_rollup(fills)
+        for account, new_trades in rollup.groupby('Account', observed=True, sort=False):
+            existing = self.summaries.get(account)
+            if existing is None:
+                self.summaries[account] = AccountSummary(account, new_trades)
+            else:
+                self.summaries[account] = existing.merge(new_trades)
+        self.rows += len(fills)
+
+    @classmethod
+    def build(cls, fills, segments=()):
+        cache = cls(segments=segments)
+        cache.update(fills)
+        return cache
+
+
+def save_summaries(cache, path=trade_store.store_dir):
+    os.makedirs(path, exist_ok=True)
+    summary_path = os.path.join(path, summary_file_name)
+    with open(summary_path + '.tmp', 'wb') as f:
+        pickle.dump(cache, f)
+    os.replace(summary_path + '.tmp', summary_path)
+
+
+def read_summaries(path=trade_store.store_dir):
+    summary_path = os.path.join(path, summary_file_name)
+    if not os.path.exists(summary_path):
+        return None
+    try:
+        with open(summary_path, 'rb') as f:
+            return pickle.load(f)
+    except Exception as e:
+        print(f"Rebuilding account summaries: {e}")
+        return None
+
+
+def load_summaries(path=trade_store.store_dir):
+    trade_store.ensure_store(path)
+    meta = trade_store.read_meta(path)
+    cache = read_summaries(path)
+    if cache is not None and getattr(cache, 'version', None) != summary_version:
+        cache = None
+    if cache is not None and cache.rows == meta['rows']:
+        # Same rows, at most compacted into other segments
+        if cache.segments != meta['segments']:
+            cache.segments = list(meta['segments'])
+            save_summaries(cache, path)
+        return cache
+    if cache is not None:
+        new_segments = [segment_name for segment_name in meta['segments'] if segment_name not in cache.segments]
+        new_fills = trade_store.load_trades(path, segments=new_segments)
+        if cache.rows + len(new_fills) == meta['rows']:
+            cache.update(new_fills)
+            cache.segments = list(meta['segments'])
+            save_summaries(cache, path)
+            return cache
+    cache = SummaryCache.build(trade_store.load_trades(path), meta['segments'])
+    save_summaries(cache, path)
+    return cache
@@ -0,0 +1,149 @@
+import atexit
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import matplotlib.dates as mdates
+from PyQt5 import QtCore
+from PyQt5.QtCore import pyqtSignal
+
+import account_summary
+import trade_stats
+
+
+period_formats = {'Day': '%m/%d/%Y', 'Week': 'Week of %m/%d/%Y', 'Month': '%B %Y'}
+
+# Everything the worker needs, captured on the GUI thread when the request is made
+AnalyticsRequest = namedtuple('AnalyticsRequest', ['generation', 'account', 'summary', 'curve', 'bet', 'target',
+                                                   'breach', 'target_lines', 'start', 'end'])
+# Everything the GUI thread draws. The arrays are read-only and the frames are slices nobody writes to,
+# so a result can be handed across threads and kept as long as it is shown.
+AnalyticsResult = namedtuple('AnalyticsResult', ['generation', 'account', 'trades', 'daily', 'stats', 'drawdown_text',
+                                                 'line_x', 'line_y', 'line_tooltips', 'target', 'threshold_x',
+                                                 'threshold_y', 'bar_views'])
+
+
+def read_only(array):
+    array.setflags(write=False)
+    return array
+
+
+def trade_tooltips(trades):
+    # (date, bar) tooltip text of every trade in an account rollup
+    dates = "Date: " + trades['EntryT'].dt.strftime('%m/%d - %H:%M')
+    bar_text = (dates + "\nRR: " + trades['Profit'].map('{:.2f}'.format) + "\nQty: " + trades['Qty'].astype(str) +
+                "\nLorS: " + trades['LorS'].astype(str) + "\nAccount: " + trades['Account'].astype(str))
+    return read_only(dates.to_numpy(dtype=object)), read_only(bar_text.to_numpy(dtype=object))
+
+
+def drawdown_text(curve, breach):
+    if curve.empty:
+        return ""
+    if pd.notnull(breach) and breach <= curve['ExitT'].iloc[-1]:
+        return f"\nThreshold breached: {breach.strftime('%m/%d - %H:%M')}"
+    return f"\nTo Liquidation: ${curve['ToLiquidation'].iloc[-1]:.2f} | To Target: ${curve['ToTarget'].iloc[-1]:.2f}"
+
+
+def bar_views(summary, trades, daily, bar_text):
+    # (bars, tooltips) for every aggregation level, so switching levels on screen only swaps them
+    views = {'Trade': (trades.reset_index(drop=True), bar_text)}
+    for level in account_summary.aggregation_levels[1:]:
+        bars = summary.period_rollup(daily, level)
+        dates = bars['Date'].dt.strftime(period_formats[level])
+        tooltips = dates + "\nProfit: " + bars['Profit'].map('{:.2f}'.format) + "\nTrades: " + bars['Trades'].astype(str)
+        views[level] = (bars, read_only(tooltips.to_numpy(dtype=object)))
+    return views
+
+
+def compute_analytics(request, tooltips):
+    # tooltips: trade_tooltips of the whole account, sliced here to the trades in range
+    trades, daily = request.summary.between(request.start, request.end)
+    positions = trades.index.to_numpy()
+    dates, bar_text = tooltips[0][positions], tooltips[1][positions]
+    line_x = read_only(mdates.date2num(trades['EntryT'].to_numpy()))
+    line_y = read_only(trades['Profit'].to_numpy(dtype='float64').cumsum())
+    line_tooltips = np.array([f"{date}\nProfit: {profit:.2f}" for date, profit in zip(dates, line_y)], dtype=object)
+    curve = request.curve.iloc[positions] if len(request.curve) else request.curve
+
+    # Target and trailing threshold, shifted because the graph starts at 0 on the first trade in range
+    # while the curve starts at the account's opening balance
+    target = threshold_x = threshold_y = None
+    if request.target_lines and not curve.empty:
+        offset = curve['Equity'].iloc[0] - trades['Profit'].iloc[0]
+        target = request.target - offset
+        threshold_x = read_only(mdates.date2num(curve['EntryT'].to_numpy()))
+        threshold_y = read_only(curve['Threshold'].to_numpy() - offset)
+
+    return AnalyticsResult(
+        generation=request.generation,
+        account=request.account,
+        trades=trades,
+        daily=daily,
+        stats=trade_stats.compute_stats(trades, request.bet),
+        drawdown_text=drawdown_text(curve, request.breach),
+        line_x=line_x,
+        line_y=line_y,
+        line_tooltips=read_only(line_tooltips),
+        target=target,
+        threshold_x=threshold_x,
+        threshold_y=threshold_y,
+        bar_views=bar_views(request.summary, trades, daily, bar_text),
+    )
+
+
+class AnalyticsWorker(QtCore.QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(int, str)
+
+    def __init__(self):
+        super().__init__()
+        # Written by the GUI thread whenever it starts a new generation
+        self.latest_generation = 0
+        # Trade tooltips per account, formatted once per rollup. Only touched on the worker thread.
+        self.tooltip_cache = {}
+
+    def run(self, request):
+        # Requests queue up behind the one being computed, the ones already superseded are not worth computing
+        if request.generation < self.latest_generation:
+            return
+        try:
+            result = compute_analytics(request, self.trade_tooltips(request))
+        except Exception as e:
+            self.failed.emit(request.generation, str(e))
+        else:
+            self.finished.emit(result)
+
+    def trade_tooltips(self, request):
+        cached = self.tooltip_cache.get(request.account)
+        if cached is None or cached[0] is not request.summary.trades:
+            cached = self.tooltip_cache[request.account] = (request.summary.trades, trade_tooltips(request.summary.trades))
+        return cached[1]
+
+
+# Worker threads are owned here rather than by the dialog that started them. A dialog can be dropped at any
+# time, a running QThread must not be, so an entry stays until its thread has finished.
+worker_threads = set()
+
+
+def start_worker():
+    thread = QtCore.QThread()
+    worker = AnalyticsWorker()
+    worker.moveToThread(thread)
+    entry = (thread, worker)
+    worker_threads.add(entry)
+    thread.finished.connect(lambda: worker_threads.discard(entry))
+    thread.start()
+    return thread, worker
+
+
+def stop_worker(thread):
+    thread.quit()
+    thread.wait()
+
+
+def stop_workers():
+    for thread, _ in list(worker_threads):
+        stop_worker(thread)
+
+
+atexit.register(stop_workers)
@@ -1,9 +1,9 @@
 import sys
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout,
-                             QLabel, QGridLayout, QHBoxLayout, QPushButton, QSizePolicy)
-from PyQt5.QtCore import QDate, Qt
-from PyQt5.QtGui import QFont
-import pandas as pd
+                             QLabel, QGridLayout, QHBoxLayout, QPushButton, QSizePolicy, QToolTip)
+from PyQt5.QtCore import QDate, Qt, QRectF, QPointF
+from PyQt5.QtGui import QFont, QColor, QPainter
+import numpy as np
 
 class CustomCalendar(QWidget):
     def __init__(self, parent=None):
@@ -28,11 +28,17 @@ class CustomCalendar(QWidget):
         self.layout.addLayout(self.calendar_layout)
 
         self.dates = {}
+        # (year, month) -> {day: (row, col)}, laid out once per month shown
+        self.month_cells = {}
+        # day -> label of the month currently shown
+        self.day_cells = {}
+        # (year, month) -> [(day, profit, trades), ...] of the days with trades
+        self.months = {}
         self.current_date = QDate.currentDate()
         self.initUI()
         self.setDate(self.current_date.year(), self.current_date.month())
 
-        self.account_data = {}
+        self.account_data = None
 
     def initUI(self):
         # Create labels for the days of the week
@@ -60,50 +66,48 @@ class CustomCalendar(QWidget):
                 self.calendar_layout.addWidget(date_label, row, col)
                 self.dates[(row, col)] = date_label
 
+    def monthCells(self, year, month):
+        if (year, month) not in self.month_cells:
+            date = QDate(year, month, 1)
+            first_col = date.dayOfWeek() - 1  # PyQt5: Monday=1, Sunday=7
+            self.month_cells[(year, month)] = {day: (1 + (first_col + day - 1) // 7, (first_col + day - 1) % 7)
+                                               for day in range(1, date.daysInMonth() + 1)}
+        return self.month_cells[(year, month)]
+
     def setDate(self, year, month):
         self.current_month_label.setText(f"{QDate.longMonthName(month)} {year}")
         self.current_month_label.setAlignment(Qt.AlignCenter)
-        date = QDate(year, month, 1)
-        day_of_week = date.dayOfWeek() - 1  # PyQt5: Monday=1, Sunday=7
-        for row in range(1, 7):
-            for col in range(7):
-                self.dates[(row, col)].setText("")
-
-        row = 1
-        col = day_of_week
-        while date.month() == month:
-            if col < 7:  # Exclude Sunday
-                self.dates[(row, col)].setText(str(date.day()))
-                col += 1
-            date = date.addDays(1)
-            if col >= 7:
-                col = 0
-                row += 1
+        for label in self.dates.values():
+            label.setText("")
+        self.day_cells = {}
+        for day, cell in self.monthCells(year, month).items():
+            self.day_cells[day] = self.dates[cell]
+            self.day_cells[day].setText(str(day))
 
     def setText(self, day, text):
-        for (row, col), label in self.dates.items():
-            if label.text() == str(day):
-                label.setText(f"{day}\n{text}")
-                break
+        self.day_cells[day].setText(f"{day}\n{text}")
+
+    def set_daily(self, daily):
+        # daily: the account's daily rollup (Date, Profit, Trades) sorted by Date, split once into months
+        # so showing a month is a dict lookup
+        self.account_data = daily
+        self.months = {}
+        dates = daily['Date'].to_numpy(dtype='datetime64[D]')
+        if len(dates):
+            months = dates.astype('datetime64[M]')
+            days = ((dates - months).astype('int64') + 1).tolist()
+            profit = daily['Profit'].tolist()
+            trades = daily['Trades'].tolist()
+            starts = np.flatnonzero(np.concatenate(([True], months[1:] != months[:-1]))).tolist()
+            for start, end in zip(starts, starts[1:] + [len(days)]):
+                month = months[start].item()
+                self.months[(month.year, month.month)] = list(zip(days[start:end], profit[start:end], trades[start:end]))
+        self.setDate(self.current_date.year(), self.current_date.month())
+        self.update_calendar()
 
     def update_calendar(self):
-        data = self.account_data
-        data = data.groupby('EntryT').agg({'Profit': 'sum', 'LorS': 'first'}).reset_index()
-
-        data['EntryT'] = pd.to_datetime(data['EntryT'])
-        data['Date'] = data['EntryT'].dt.date
-        grouped_data = data.groupby('Date').agg({
-            'Profit': 'sum',
-            'EntryT': 'count'  # Count the number of trades (using any column, here EntryT)
-        }).rename(columns={'EntryT': 'Trades'}).reset_index()
-
-        # Add text to the calendar based on the grouped data
-        for index, row in grouped_data.iterrows():
-            date = row['Date']
-            if date.month == self.current_date.month() and date.year == self.current_date.year():
-                day = date.day
-                text = f"Profit: {row['Profit']}\nTrades: {row['Trades']}"
-                self.setText(day, text)
+        for day, profit, trades in self.months.get((self.current_date.year(), self.current_date.month()), []):
+            self.setText(day, f"Profit: {profit}\nTrades: {trades}")
 
     def prevMonth(self):
         self.current_date = self.current_date.addMonths(-1)
@@ -113,4 +117,167 @@ class CustomCalendar(QWidget):
     def nextMonth(self):
         self.current_date = self.current_date.addMonths(1)
         self.setDate(self.current_date.year(), self.current_date.month())
-        self.update_calendar()
\ No newline at end of file
+        self.update_calendar()
+
+class HeatmapView(QWidget):
+    # Daily P&L as colored cells painted in one paintEvent, either one month or a whole year as 12 small
+    # months. Hovered cells are found with the same arithmetic that places them, no widget exists per day.
+    header_height = 18
+    title_height = 16
+    no_trades_color = QColor('#E0E0E0')
+
+    def __init__(self, parent=None):
+        super(HeatmapView, self).__init__(parent)
+        self.setMouseTracking(True)
+        self.setMinimumSize(490, 350)
+        self.mode = 'Month'
+        self.current_date = QDate.currentDate()
+        self.days = np.empty(0, dtype='datetime64[D]')
+        self.profit = np.empty(0)
+        self.trades = np.empty(0, dtype='int64')
+        # year -> (profit, trades, color scale) indexed by day of year, built on first paint of the year
+        self.years = {}
+
+    def set_daily(self, daily):
+        # daily: the account's daily rollup (Date, Profit, Trades) sorted by Date
+        self.days = daily['Date'].to_numpy(dtype='datetime64[D]')
+        self.profit = daily['Profit'].to_numpy(dtype='float64')
+        self.trades = daily['Trades'].to_numpy(dtype='int64')
+        self.years = {}
+        self.update()
+
+    def setView(self, mode, date):
+        self.mode = mode
+        self.current_date = date
+        self.update()
+
+    def yearValues(self, year):
+        if year not in self.years:
+            first = np.datetime64(f'{year:04d}-01-01')
+            lo, hi = np.searchsorted(self.days, [first, np.datetime64(f'{year + 1:04d}-01-01')])
+            offsets = (self.days[lo:hi] - first).astype('int64')
+            profit = np.full(366, np.nan)
+            trades = np.zeros(366, dtype='int64')
+            profit[offsets] = self.profit[lo:hi]
+            trades[offsets] = self.trades[lo:hi]
+            scale = np.abs(self.profit[lo:hi]).max() if hi > lo else 0.0
+            self.years[year] = (profit, trades, scale)
+        return self.years[year]
+
+    def dayValues(self, date):
+        profit, trades, _ = self.yearValues(date.year())
+        return profit[date.dayOfYear() - 1], trades[date.dayOfYear() - 1]
+
+    def color(self, profit, scale):
+        if np.isnan(profit):
+            return self.no_trades_color
+        color = QColor(0, 140, 0) if profit > 0 else QColor(200, 0, 0) if profit < 0 else QColor(128, 128, 128)
+        color.setAlphaF(0.25 + 0.75 * min(abs(profit) / scale, 1.0) if scale else 1.0)
+        return color
+
+    def months(self):
+        # (month, box) of every month drawn: the whole widget in month mode, a 4x3 grid in year mode
+        if self.mode == 'Month':
+            return [(self.current_date.month(), QRectF(self.rect()))]
+        width, height = self.width() / 4, self.height() / 3
+        return [(month, QRectF((month - 1) % 4 * width, (month - 1) // 4 * height, width, height).adjusted(4, 0, -4, -4))
+                for month in range(1, 13)]
+
+    def grid(self, box):
+        # Top of the day cells and the cell size inside one month box
+        top = box.top() + (self.header_height if self.mode == 'Month' else self.title_height)
+        return top, box.width() / 7, (box.bottom() - top) / 6
+
+    def cellRect(self, box, first_col, day):
+        top, cell_width, cell_height = self.grid(box)
+        position = first_col + day - 1
+        return QRectF(box.left() + position % 7 * cell_width, top + position // 7 * cell_height, cell_width, cell_height)
+
+    def dateAt(self, pos):
+        for month, box in self.months():
+            if not box.contains(pos):
+                continue
+            top, cell_width, cell_height = self.grid(box)
+            if pos.y() < top:
+                return None
+            first = QDate(self.current_date.year(), month, 1)
+            position = int((pos.y() - top) // cell_height) * 7 + int((pos.x() - box.left()) // cell_width)
+            day = position - (first.dayOfWeek() - 1) + 1
+            return first.addDays(day - 1) if 1 <= day <= first.daysInMonth() else None
+        return None
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        year = self.current_date.year()
+        _, _, scale = self.yearValues(year)
+        small_font = QFont()
+        small_font.setPointSize(7)
+        painter.setFont(small_font)
+        for month, box in self.months():
+            first = QDate(year, month, 1)
+            first_col = first.dayOfWeek() - 1  # PyQt5: Monday=1, Sunday=7
+            top, cell_width, _ = self.grid(box)
+            painter.setPen(Qt.black)
+            if self.mode == 'Month':
+                for col, day_name in enumerate(["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]):
+                    painter.drawText(QRectF(box.left() + col * cell_width, box.top(), cell_width, top - box.top()), Qt.AlignCenter, day_name)
+            else:
+                painter.drawText(QRectF(box.left(), box.top(), box.width(), top - box.top()), Qt.AlignCenter, QDate.shortMonthName(month))
+            for day in range(1, first.daysInMonth() + 1):
+                profit, trades = self.dayValues(first.addDays(day - 1))
+                rect = self.cellRect(box, first_col, day).adjusted(1, 1, -1, -1)
+                painter.fillRect(rect, self.color(profit, scale))
+                if self.mode == 'Month':
+                    text = f"{day}\n{profit:.2f}\n{trades} trades" if trades else str(day)
+                    painter.drawText(rect, Qt.AlignCenter, text)
+        painter.end()
+
+    def mouseMoveEvent(self, event):
+        date = self.dateAt(QPointF(event.pos()))
+        if date is None:
+            QToolTip.hideText()
+            return
+        profit, trades = self.dayValues(date)
+        text = date.toString("ddd MM/dd/yyyy") + (f"\nProfit: {profit:.2f}\nTrades: {trades}" if trades else "\nNo trades")
+        QToolTip.showText(event.globalPos(), text, self)
+
+
+class HeatmapCalendar(QWidget):
+    # Navigation around a HeatmapView, stepping by month or by year depending on the mode
+    def __init__(self, parent=None):
+        super(HeatmapCalendar, self).__init__(parent)
+        self.layout = QVBoxLayout(self)
+        self.navigation_layout = QHBoxLayout()
+        self.prev_button = QPushButton("<", self)
+        self.prev_button.clicked.connect(lambda: self.step(-1))
+        self.current_label = QLabel(self)
+        self.current_label.setAlignment(Qt.AlignCenter)
+        self.next_button = QPushButton(">", self)
+        self.next_button.clicked.connect(lambda: self.step(1))
+        self.navigation_layout.addWidget(self.prev_button)
+        self.navigation_layout.addWidget(self.current_label)
+        self.navigation_layout.addWidget(self.next_button)
+        self.layout.addLayout(self.navigation_layout)
+        self.view = HeatmapView(self)
+        self.layout.addWidget(self.view)
+        self.mode = 'Month'
+        self.current_date = QDate.currentDate()
+        self.showCurrent()
+
+    def set_daily(self, daily):
+        self.view.set_daily(daily)
+
+    def setMode(self, mode):
+        self.mode = mode
+        self.showCurrent()
+
+    def step(self, direction):
+        self.current_date = self.current_date.addMonths(direction) if self.mode == 'Month' else self.current_date.addYears(direction)
+        self.showCurrent()
+
+    def showCurrent(self):
+        if self.mode == 'Month':
+            self.current_label.setText(f"{QDate.longMonthName(self.current_date.month())} {self.current_date.year()}")
+        else:
+            self.current_label.setText(str(self.current_date.year()))
+        self.view.setView(self.mode, self.current_date)
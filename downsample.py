@@ -0,0 +1,25 @@
+import numpy as np
+
+
+def minmax_indices(x, y, x_min, x_max, buckets):
+    # Indices of the points worth drawing between x_min and x_max on an axis `buckets` pixels wide.
+    # x must be sorted. Every pixel column keeps its first, last, lowest and highest point (M4), which
+    # renders the same line as drawing them all; one point beyond each edge keeps the line running
+    # off-screen. Ranges with few points per pixel come back whole.
+    lo = max(np.searchsorted(x, x_min, side='left') - 1, 0)
+    hi = min(np.searchsorted(x, x_max, side='right') + 1, len(x))
+    buckets = max(int(buckets), 1)
+    if hi - lo <= 4 * buckets or x_max <= x_min:
+        return np.arange(lo, hi)
+    xs = x[lo:hi]
+    ys = y[lo:hi]
+    bucket = np.clip(((xs - x_min) / (x_max - x_min) * buckets).astype('int64'), -1, buckets)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(bucket)) + 1))
+    lengths = np.diff(np.concatenate((starts, [len(xs)])))
+    segments = np.repeat(np.arange(len(starts)), lengths)
+    keep = [starts, starts + lengths - 1]
+    for extreme in (np.minimum, np.maximum):
+        hits = np.flatnonzero(ys == np.repeat(extreme.reduceat(ys, starts), lengths))
+        first = np.concatenate(([True], segments[hits][1:] != segments[hits][:-1]))
+        keep.append(hits[first])
+    return np.unique(np.concatenate(keep)) + lo
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+
+# Apex evaluation rules per account size (ASize, in thousands): profit target and trailing drawdown
+targets = {25: 1500, 50: 3000, 75: 4250, 100: 6000, 150: 9000, 250: 15000, 300: 20000}
+stop_losses = {25: 1500, 50: 2500, 75: 2750, 100: 3000, 150: 5000, 250: 6500, 300: 7500}
+curve_columns = ['Account', 'EntryT', 'ExitT', 'Equity', 'Threshold', 'ToLiquidation', 'ToTarget']
+
+
+def account_size(data_settings, account):
+    account_row = data_settings.loc[data_settings['Account'] == account]
+    if account_row.empty or pd.isnull(account_row['ASize'].values[0]):
+        return None
+    return int(account_row['ASize'].values[0])
+
+
+def segmented_maximum_accumulate(values, segments):
+    # Running max that restarts at every segment: each segment is lifted above all earlier ones so
+    # one np.maximum.accumulate pass never carries a peak from one account into the next
+    span = values.max() - values.min() + 1
+    lift = segments * span
+    return np.maximum.accumulate(values + lift) - lift
+
+
+class DrawdownResult:
+    # curves: one row per trade of every evaluated account, in account then EntryT order.
+    # accounts: one row per account with its rules, the latest threshold and the breach time.
+    def __init__(self, curves, accounts):
+        self.curves = curves
+        self.accounts = accounts
+
+    def curve(self, account):
+        if account not in self.accounts.index:
+            return self.curves.iloc[0:0]
+        row = self.accounts.loc[account]
+        return self.curves.iloc[row['Start']:row['End']]
+
+
+def evaluate_accounts(summaries, data_settings, accounts=None):
+    # Trailing threshold, distance to liquidation/target and first breach for every account in one pass.
+    # Everything is in profit terms (0 = starting balance), the same scale as the TargetLine/StopLine settings.
+    names, sizes, frames = [], [], []
+    for account in summaries.accounts() if accounts is None else accounts:
+        size = account_size(data_settings, account)
+        summary = summaries.get(account)
+        if size not in targets or summary is None or summary.trades.empty:
+            continue
+        names.append(account)
+        sizes.append(size)
+        frames.append(summary.trades)
+    if not frames:
+        # Typed like a real result, so callers can reindex it and convert columns the same way
+        curves = pd.DataFrame({'Account': pd.Series(dtype=object), 'EntryT': pd.Series(dtype='datetime64[ns]'),
+                               'ExitT': pd.Series(dtype='datetime64[ns]'),
+                               **{column: pd.Series(dtype='float64') for column in curve_columns[3:]}})
+        accounts = pd.DataFrame({
+            'ASize': pd.Series(dtype='int64'),
+            **{column: pd.Series(dtype='float64') for column in ['Target', 'StopLoss', 'Equity', 'Threshold']},
+            'BreachT': pd.Series(dtype='datetime64[ns]'),
+            'Start': pd.Series(dtype='int64'),
+            'End': pd.Series(dtype='int64'),
+        }, index=pd.Index([], name='Account', dtype=object))
+        return DrawdownResult(curves, accounts)
+
+    lengths = np.array([len(frame) for frame in frames])
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    segments = np.repeat(np.arange(len(frames)), lengths)
+    profit = np.concatenate([frame['Profit'].to_numpy(dtype='float64') for frame in frames])
+    entry_times = np.concatenate([frame['EntryT'].to_numpy(dtype='datetime64[ns]') for frame in frames])
+    exit_times = np.concatenate([frame['ExitT'].to_numpy(dtype='datetime64[ns]') for frame in frames])
+    account_targets = np.array([targets[size] for size in sizes], dtype='float64')
+    account_stops = np.array([stop_losses[size] for size in sizes], dtype='float64')
+
+    # Segmented cumulative sum: subtract the running total reached before each account starts
+    totals = np.cumsum(profit)
+    offsets = np.concatenate(([0.0], totals[ends[:-1] - 1]))
+    equity = (totals - offsets[segments]).round(2)
+    # The threshold trails the highest equity reached, never starting below the opening balance
+    peaks = segmented_maximum_accumulate(np.maximum(equity, 0.0), segments)
+    threshold = (peaks - account_stops[segments]).round(2)
+    to_liquidation = (equity - threshold).round(2)
+    to_target = (account_targets[segments] - equity).round(2)
+
+    breach_times = np.full(len(frames), np.datetime64('NaT'), dtype='datetime64[ns]')
+    breached = np.flatnonzero(to_liquidation <= 0)
+    breached_segments, first = np.unique(segments[breached], return_index=True)
+    breach_times[breached_segments] = exit_times[breached[first]]
+
+    curves = pd.DataFrame({
+        'Account': np.repeat(np.array(names, dtype=object), lengths),
+        'EntryT': entry_times,
+        'ExitT': exit_times,
+        'Equity': equity,
+        'Threshold': threshold,
+        'ToLiquidation': to_liquidation,
+        'ToTarget': to_target,
+    })
+    accounts = pd.DataFrame({
+        'ASize': sizes,
+        'Target': account_targets,
+        'StopLoss': account_stops,
+        'Equity': equity[ends - 1],
+        'Threshold': threshold[ends - 1],
+        'BreachT': breach_times,
+        'Start': starts,
+        'End': ends,
+    }, index=pd.Index(names, name='Account'))
+    return DrawdownResult(curves, accounts)
+
+
+def update_account_lines(result, data_settings, settings_path):
+    # Keep the TargetLine/StopLine columns of account_settings.csv in step with the engine,
+    # and only rewrite the file when a value actually moved. Settings files written before these columns
+    # existed get them here.
+    lines = result.accounts
+    rows = data_settings['Account'].isin(lines.index)
+    if not rows.any():
+        return False
+    for column in ['TargetLine', 'StopLine']:
+        if column not in data_settings.columns:
+            data_settings[column] = np.nan
+    target_lines = data_settings.loc[rows, 'Account'].map(lines['Target']).astype('float64').round(2)
+    stop_lines = data_settings.loc[rows, 'Account'].map(lines['Threshold']).astype('float64').round(2)
+    unchanged = [np.isclose(new.to_numpy(), pd.to_numeric(data_settings.loc[rows, column], errors='coerce').to_numpy(dtype='float64'),
+                            equal_nan=True, rtol=0, atol=0.005).all()
+                 for new, column in ((target_lines, 'TargetLine'), (stop_lines, 'StopLine'))]
+    if all(unchanged):
+        return False
+    data_settings['TargetLine'] = pd.to_numeric(data_settings['TargetLine'], errors='coerce')
+    data_settings['StopLine'] = pd.to_numeric(data_settings['StopLine'], errors='coerce')
+    data_settings.loc[rows, 'TargetLine'] = target_lines
+    data_settings.loc[rows, 'StopLine'] = stop_lines
+    data_settings.to_csv(settings_path, index=False)
+    return True
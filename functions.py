@@ -1,89 +1,214 @@
+import numpy as np
 import pandas as pd
 import os
-import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from collections import namedtuple
+from pandas.tseries.api import guess_datetime_format
+import trade_store
+import account_summary
 
 
-use_data_path = 'resources/to_use_data.csv'
 visibility_file_path = 'resources/account_settings.csv'
 
+ImportResult = namedtuple('ImportResult', ['inserted', 'skipped', 'segments'], defaults=((),))
+FileImportReport = namedtuple('FileImportReport', ['file_name', 'rows', 'inserted', 'seconds', 'error'])
+BatchImportResult = namedtuple('BatchImportResult', ['inserted', 'skipped', 'files', 'segments'], defaults=((),))
 
-def update_with_new_data(file_name):
-    if not os.path.exists(file_name) or os.stat(file_name).st_size == 0:
-        print("Missing or empty data from broker. Please import data as instructed and try again.")
-        return
 
-    new_trades = pd.read_csv(file_name)
-
-    # List of required columns and their mappings
-    required_columns = {
-        'Instrument': 'Instrument',
-        'Account': 'Account',
-        'Market pos.': 'LorS',
-        'Qty': 'Qty',
-        'Entry price': 'EntryP',
-        'Exit price': 'ExitP',
-        'Entry time': 'EntryT',
-        'Exit time': 'ExitT',
-        'Profit': 'Profit',
-        'Commission': 'Com'
-    }
-
-    # Check for missing columns
-    missing_columns = set(required_columns.keys()) - set(new_trades.columns)
-    if missing_columns:
-        print(f"Missing required columns: {missing_columns}")
-        return
+class ImportCancelled(Exception):
+    pass
+
+
+def check_cancelled(is_cancelled):
+    if is_cancelled is not None and is_cancelled():
+        raise ImportCancelled("Import cancelled.")
+
+
+# List of required columns and their mappings
+required_columns = {
+    'Instrument': 'Instrument',
+    'Account': 'Account',
+    'Market pos.': 'LorS',
+    'Qty': 'Qty',
+    'Entry price': 'EntryP',
+    'Exit price': 'ExitP',
+    'Entry time': 'EntryT',
+    'Exit time': 'ExitT',
+    'Profit': 'Profit',
+    'Commission': 'Com'
+}
+import_chunksize = 50000
+currency_table = str.maketrans({'$': None, ',': None, ' ': None, '(': '-', ')': None})
+
+
+def parse_currency(values):
+    # Single pass over the distinct strings only: drop '$', ',' and ')' and turn '(' into a minus sign
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float).round(2)
+    codes, uniques = pd.factorize(values)
+    parsed = pd.to_numeric(pd.Series(uniques, dtype=object).astype(str).str.translate(currency_table),
+                           errors='coerce').round(2).to_numpy(dtype='float64')
+    return pd.Series(np.where(codes >= 0, parsed[codes], np.nan), index=values.index)
 
-    new_trades.rename(columns=required_columns, inplace=True)
-    new_trades = new_trades[list(required_columns.values())]
-
-    columns_to_modify = ['Profit', 'Com']
-    for column in columns_to_modify:
-        new_trades[column] = new_trades[column].astype(str).str.replace(r'[$,)]', '', regex=True).str.replace(r'\(',
-                                                                                                              '-',
-                                                                                                              regex=True)
-        new_trades[column] = new_trades[column].astype(float).round(2)
-    for column in ['EntryT', 'ExitT']:
-        new_trades[column] = pd.to_datetime(new_trades[column], errors='coerce')
-
-    if os.path.exists(use_data_path) and os.stat(use_data_path).st_size > 0:
-        existing_trades = pd.read_csv(use_data_path)
-
-        last_entry_time = existing_trades['EntryT'].max()
-
-        new_trades = new_trades[new_trades['EntryT'] > last_entry_time]
-
-        if not new_trades.empty:
-            combined_trades = pd.concat([existing_trades, new_trades], ignore_index=True)
-            combined_trades.to_csv(use_data_path, index=False)
-
-            visibility_df = pd.read_csv(visibility_file_path)
-            new_accounts = set(combined_trades['Account'].unique()) - set(visibility_df['Account'])
-            if new_accounts:
-                new_accounts_df = pd.DataFrame(list(new_accounts), columns=['Account'])
-                new_accounts_df['Visibility'] = 'visible'
-                new_accounts_df['ASize'] = ''  # Add empty ASize column
-                visibility_df['TargetLines'] = 'Off'  # Add empty ASize column
-                visibility_df['BeT'] = ''
-                visibility_df = pd.concat([visibility_df, new_accounts_df], ignore_index=True)
-                visibility_df.to_csv(visibility_file_path, index=False)
-                print("account_settings.csv updated with new accounts.")
-            else:
-                print("No new accounts added to account_settings.csv")
-            print("Updated to_use_data with new trades from the broker.")
-        else:
-            print("No new trades were added. New trades must occur after the last entry time in the existing data.")
-    else:
-        new_trades.to_csv(use_data_path, index=False)
 
-        accounts = new_trades['Account'].unique()
-        visibility_df = pd.DataFrame(accounts, columns=['Account'])
+def guess_time_format(values):
+    # Guessed once from the first value so the rest of the export parses with a fixed format
+    first_value = values.dropna().astype(str)
+    return guess_datetime_format(first_value.iloc[0]) if not first_value.empty else None
+
+
+def parse_times(values, time_format=None):
+    if time_format is None:
+        return pd.to_datetime(values, errors='coerce')
+    return pd.to_datetime(values, format=time_format, errors='coerce')
+
+
+def read_broker_csv(file_name, chunksize=import_chunksize):
+    # Yields normalized chunks of at most chunksize rows, so memory stays flat whatever the export size
+    header = pd.read_csv(file_name, nrows=0)
+    missing_columns = set(required_columns.keys()) - set(header.columns)
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {missing_columns}")
+
+    time_formats = {}
+    # Text columns are read as text, so an all-numeric account ID keeps its exact spelling
+    text_columns = {column: str for column, name in required_columns.items() if name in trade_store.category_columns}
+    for chunk in pd.read_csv(file_name, usecols=list(required_columns), dtype=text_columns, chunksize=chunksize):
+        chunk = chunk.rename(columns=required_columns)[list(required_columns.values())]
+        for column in ['Profit', 'Com']:
+            chunk[column] = parse_currency(chunk[column])
+        for column in ['EntryT', 'ExitT']:
+            if column not in time_formats:
+                time_formats[column] = guess_time_format(chunk[column])
+            chunk[column] = parse_times(chunk[column], time_formats[column])
+        yield chunk
+
+
+def update_with_new_data(file_name, chunksize=import_chunksize, progress=None, is_cancelled=None):
+    # progress(rows_parsed, rows_inserted) is called after every chunk, is_cancelled() is polled before each one
+    if not os.path.exists(file_name) or os.stat(file_name).st_size == 0:
+        print("Missing or empty data from broker. Please import data as instructed and try again.")
+        return ImportResult(0, 0)
+
+    trade_store.ensure_store()
+    writer = trade_store.TradeWriter()
+    accounts = set()
+    rows_parsed = 0
+    try:
+        for chunk in read_broker_csv(file_name, chunksize):
+            check_cancelled(is_cancelled)
+            writer.append(chunk)
+            accounts.update(chunk['Account'].dropna().unique())
+            rows_parsed += len(chunk)
+            if progress is not None:
+                progress(rows_parsed, writer.inserted)
+        check_cancelled(is_cancelled)
+        inserted, skipped = writer.commit()
+    except Exception:
+        writer.rollback()
+        raise
+
+    update_account_settings(accounts)
+    if inserted:
+        account_summary.load_summaries()
+        print(f"Imported {inserted} new trades from the broker, skipped {skipped} already in the journal.")
+    else:
+        print(f"No new trades were added, all {skipped} trades are already in the journal.")
+    return ImportResult(inserted, skipped, tuple(writer.committed_segments))
+
+
+def parse_broker_file(file_name):
+    # Runs inside a worker process, so errors are returned instead of raised
+    start = time.perf_counter()
+    try:
+        if not os.path.exists(file_name) or os.stat(file_name).st_size == 0:
+            raise ValueError("Missing or empty data from broker.")
+        trades = pd.concat(list(read_broker_csv(file_name)), ignore_index=True)
+        return file_name, trades, time.perf_counter() - start, None
+    except Exception as e:
+        return file_name, None, time.perf_counter() - start, str(e)
+
+
+def import_broker_files(file_names, max_workers=None, progress=None, is_cancelled=None):
+    # Parse every export in a process pool, then dedup them against the journal and each other
+    # and commit everything as one segment
+    file_names = list(file_names)
+    if not file_names:
+        return BatchImportResult(0, 0, [])
+    max_workers = max_workers or min(len(file_names), os.cpu_count() or 1)
+
+    trade_store.ensure_store()
+    writer = trade_store.TradeWriter()
+    reports = []
+    accounts = set()
+    rows_parsed = 0
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [executor.submit(parse_broker_file, file_name) for file_name in file_names]
+        for future in futures:
+            check_cancelled(is_cancelled)
+            file_name, trades, seconds, error = future.result()
+            if error is not None:
+                reports.append(FileImportReport(file_name, 0, 0, seconds, error))
+                continue
+            writer.start_export()
+            inserted = writer.append(trades)
+            accounts.update(trades['Account'].dropna().unique())
+            reports.append(FileImportReport(file_name, len(trades), inserted, seconds, None))
+            rows_parsed += len(trades)
+            if progress is not None:
+                progress(rows_parsed, writer.inserted)
+        check_cancelled(is_cancelled)
+        inserted, skipped = writer.commit(merge_staged=True)
+    except Exception:
+        writer.rollback()
+        raise
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    for report in reports:
+        print(describe_report(report))
+    if accounts:
+        update_account_settings(accounts)
+    if inserted:
+        account_summary.load_summaries()
+    print(f"Imported {inserted} new trades from {len(file_names)} files, skipped {skipped} already in the journal.")
+    return BatchImportResult(inserted, skipped, reports, tuple(writer.committed_segments))
+
+
+def describe_report(report):
+    if report.error:
+        return f"{os.path.basename(report.file_name)}: failed after {report.seconds:.2f}s - {report.error}"
+    return f"{os.path.basename(report.file_name)}: {report.rows} rows parsed in {report.seconds:.2f}s, {report.inserted} new"
+
+
+def update_account_settings(accounts):
+    if not os.path.exists(visibility_file_path):
+        visibility_df = pd.DataFrame(sorted(accounts), columns=['Account'])
         visibility_df['Visibility'] = 'visible'
         visibility_df['ASize'] = ''
         visibility_df['TargetLines'] = 'Off'
         visibility_df['BeT'] = ''
+        visibility_df['TargetLine'] = ''
+        visibility_df['StopLine'] = ''
         visibility_df['LastUpdatedProfit'] = ''
         visibility_df.to_csv(visibility_file_path, index=False)
         print("account_settings.csv created for the firt time..")
-        print("to_use_data created for the firt time..")
+        return
 
+    visibility_df = pd.read_csv(visibility_file_path)
+    new_accounts = set(accounts) - set(visibility_df['Account'])
+    if new_accounts:
+        new_accounts_df = pd.DataFrame(sorted(new_accounts), columns=['Account'])
+        new_accounts_df['Visibility'] = 'visible'
+        new_accounts_df['ASize'] = ''  # Add empty ASize column
+        new_accounts_df['TargetLines'] = 'Off'
+        new_accounts_df['BeT'] = ''
+        new_accounts_df['TargetLine'] = ''
+        new_accounts_df['StopLine'] = ''
+        visibility_df = pd.concat([visibility_df, new_accounts_df], ignore_index=True)
+        visibility_df.to_csv(visibility_file_path, index=False)
+        print("account_settings.csv updated with new accounts.")
+    else:
+        print("No new accounts added to account_settings.csv")
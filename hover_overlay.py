@@ -0,0 +1,64 @@
+import numpy as np
+
+
+class HoverOverlay:
+    # Crosshair and tooltip drawn on top of a cached copy of the canvas. Moving the mouse restores the
+    # cached background and blits the two animated artists, the figure itself is never redrawn for a hover.
+    # hit_test(event) returns the hovered item (-1 for none), the owner passes the items' tooltip strings
+    # and data positions through set_items.
+    def __init__(self, canvas, ax, hit_test):
+        self.canvas = canvas
+        self.ax = ax
+        self.hit_test = hit_test
+        self.tooltips = np.empty(0, dtype=object)
+        self.positions = np.empty((0, 2))
+        self.hovered = -1
+        self.background = None
+        self.crosshair = ax.axvline(0, color='grey', linewidth=0.6, linestyle=':', animated=True, visible=False)
+        self.tooltip = ax.annotate('', xy=(0, 0), xytext=(15, 15), textcoords='offset points', color='white',
+                                   bbox=dict(boxstyle='round', fc='black', alpha=0.6, ec='none'),
+                                   animated=True, visible=False, zorder=10)
+        canvas.mpl_connect('draw_event', self.on_draw)
+        canvas.mpl_connect('motion_notify_event', self.on_move)
+        canvas.mpl_connect('figure_leave_event', lambda event: self.show(-1))
+
+    def set_items(self, tooltips, positions):
+        self.tooltips = tooltips
+        self.positions = positions
+        self.hovered = -1
+        self.crosshair.set_visible(False)
+        self.tooltip.set_visible(False)
+
+    def on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self.draw_overlay()
+
+    def on_move(self, event):
+        self.show(self.hit_test(event))
+
+    def show(self, index):
+        if index == self.hovered:
+            return
+        self.hovered = index
+        visible = 0 <= index < len(self.tooltips)
+        if visible:
+            x, y = self.positions[index]
+            self.crosshair.set_xdata([x, x])
+            self.tooltip.xy = (x, y)
+            self.tooltip.set_text(self.tooltips[index])
+            # Flip the tooltip to the left of the point on the right half of the axes
+            right_half = self.ax.transData.transform((x, y))[0] > self.ax.bbox.x0 + self.ax.bbox.width / 2
+            self.tooltip.set_position((-15, 15) if right_half else (15, 15))
+            self.tooltip.set_horizontalalignment('right' if right_half else 'left')
+        self.crosshair.set_visible(visible)
+        self.tooltip.set_visible(visible)
+        if self.background is None:
+            return
+        self.canvas.restore_region(self.background)
+        self.draw_overlay()
+        self.canvas.blit(self.canvas.figure.bbox)
+
+    def draw_overlay(self):
+        if self.crosshair.get_visible():
+            self.ax.draw_artist(self.crosshair)
+            self.ax.draw_artist(self.tooltip)
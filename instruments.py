@@ -0,0 +1,72 @@
+import re
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+
+ContractSpec = namedtuple('ContractSpec', ['root', 'tick_size', 'tick_value', 'point_value'])
+
+# CME/NYMEX/COMEX/CBOT contract specs, tick_value = tick_size * point_value
+contract_specs = [
+    ContractSpec('ES', 0.25, 12.5, 50.0),
+    ContractSpec('MES', 0.25, 1.25, 5.0),
+    ContractSpec('NQ', 0.25, 5.0, 20.0),
+    ContractSpec('MNQ', 0.25, 0.5, 2.0),
+    ContractSpec('YM', 1.0, 5.0, 5.0),
+    ContractSpec('MYM', 1.0, 0.5, 0.5),
+    ContractSpec('RTY', 0.1, 5.0, 50.0),
+    ContractSpec('M2K', 0.1, 0.5, 5.0),
+    ContractSpec('CL', 0.01, 10.0, 1000.0),
+    ContractSpec('MCL', 0.01, 1.0, 100.0),
+    ContractSpec('GC', 0.1, 10.0, 100.0),
+    ContractSpec('MGC', 0.1, 1.0, 10.0),
+    ContractSpec('SI', 0.005, 25.0, 5000.0),
+    ContractSpec('6E', 0.00005, 6.25, 125000.0),
+    ContractSpec('ZN', 0.015625, 15.625, 1000.0),
+    ContractSpec('ZB', 0.03125, 31.25, 1000.0),
+]
+roots = [spec.root for spec in contract_specs]
+root_index = {root: code for code, root in enumerate(roots)}
+
+# Indexed by root code; code -1 (unknown root) lands on the trailing zero
+tick_sizes = np.array([spec.tick_size for spec in contract_specs] + [0.0])
+tick_values = np.array([spec.tick_value for spec in contract_specs] + [0.0])
+point_values = np.array([spec.point_value for spec in contract_specs] + [0.0])
+
+month_names = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
+symbol_pattern = re.compile(r'^\s*(?P<root>[A-Z0-9]+)\s+(?:(?P<month>\d{2})-(?P<year>\d{2})|(?P<month_name>[A-Z]{3})(?P<short_year>\d{2}))\s*$')
+
+
+def parse_symbol(symbol):
+    # NinjaTrader symbols: "ES 06-24" or "MES MAR24" -> ('ES', Period('2024-06')), unknown formats -> (symbol, None)
+    match = symbol_pattern.match(str(symbol).upper())
+    if match is None:
+        return str(symbol).strip(), None
+    if match['month']:
+        month, year = int(match['month']), int(match['year'])
+    elif match['month_name'] in month_names:
+        month, year = month_names.index(match['month_name']) + 1, int(match['short_year'])
+    else:
+        return match['root'], None
+    if not 1 <= month <= 12:
+        return match['root'], None
+    return match['root'], pd.Period(year=2000 + year, month=month, freq='M')
+
+
+def root_code(symbol):
+    return root_index.get(parse_symbol(symbol)[0], -1)
+
+
+def root_codes(instruments):
+    # Parse each distinct symbol once and broadcast through the category codes
+    instruments = instruments if isinstance(instruments.dtype, pd.CategoricalDtype) else instruments.astype('category')
+    lookup = np.full(len(instruments.cat.categories) + 1, -1, dtype='int32')
+    lookup[:-1] = [root_code(symbol) for symbol in instruments.cat.categories]
+    return lookup[instruments.cat.codes.to_numpy()]
+
+
+def trade_root_codes(trades):
+    if 'RootCode' in trades:
+        return trades['RootCode'].to_numpy()
+    return root_codes(trades['Instrument'])
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+import drawdown
+import instruments
+import trade_stats
+
+
+summary_columns = ['ASize', 'Trades', 'NetPnL', 'WinRate', 'LossRate', 'BeRate', 'AvgWin', 'AvgLoss', 'RR',
+                   'ProfitFactor', 'Expectancy', 'TradingDays', 'BestDay', 'WorstDay', 'LastDay', 'Equity',
+                   'Threshold', 'ToLiquidation', 'ToTarget', 'BreachT']
+
+
+def stacked(frames, columns):
+    # Concatenate the per-account frames column by column, plus the account number of every row
+    lengths = np.array([len(frame) for frame in frames])
+    segments = np.repeat(np.arange(len(frames)), lengths)
+    values = {column: np.concatenate([frame[column].to_numpy() for frame in frames]) for column in columns}
+    return lengths, segments, values
+
+
+def ratio(numerator, denominator):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator != 0, numerator / np.where(denominator != 0, denominator, 1), np.nan)
+
+
+def evaluate_portfolio(summaries, data_settings, accounts=None, start=None, end=None):
+    # One row per account with trade stats, daily P&L extremes and the Apex drawdown state. Every account
+    # is a contiguous run of rows in one stacked array, so each figure is a single bincount/reduceat.
+    accounts = summaries.accounts() if accounts is None else list(accounts)
+    names, trade_frames, daily_frames = [], [], []
+    for account in accounts:
+        summary = summaries.get(account)
+        if summary is None:
+            continue
+        trades, daily = summary.between(start, end)
+        if trades.empty:
+            continue
+        names.append(account)
+        trade_frames.append(trades)
+        daily_frames.append(daily)
+    if not names:
+        return pd.DataFrame(columns=summary_columns, index=pd.Index([], name='Account'))
+
+    count = len(names)
+    lengths, segments, values = stacked(trade_frames, ['Profit'])
+    profit = values['Profit'].astype('float64')
+    root_codes = np.concatenate([instruments.trade_root_codes(frame) for frame in trade_frames])
+    bets = np.array([trade_stats.account_bet(account, data_settings) for account in names], dtype='float64')
+    tick_values = instruments.tick_values[root_codes]
+    thresholds = np.where(tick_values == 0, 0.0, tick_values * bets[segments])
+    results = trade_stats.classify(profit, thresholds)
+
+    def per_account(mask=None, weights=None):
+        selected = segments if mask is None else segments[mask]
+        selected_weights = None if weights is None else (weights if mask is None else weights[mask])
+        return np.bincount(selected, weights=selected_weights, minlength=count)
+
+    wins = per_account(results == trade_stats.win)
+    losses = per_account(results == trade_stats.loss)
+    break_evens = lengths - wins - losses
+    net_pnl = per_account(weights=profit)
+    avg_win = ratio(per_account(results == trade_stats.win, profit), wins)
+    avg_loss = ratio(per_account(results == trade_stats.loss, profit), losses)
+    gross_profit = per_account(profit > 0, profit)
+    gross_loss = -per_account(profit < 0, profit)
+
+    day_lengths, _, day_values = stacked(daily_frames, ['Profit'])
+    day_profit = day_values['Profit'].astype('float64')
+    day_starts = np.cumsum(day_lengths) - day_lengths
+
+    # Drawdown state as of the last trade in range, for the accounts that have an ASize
+    drawdowns = drawdown.evaluate_accounts(summaries, data_settings, names)
+    rules = drawdowns.accounts.reindex(names)
+    has_rules = rules['Start'].notna().to_numpy()
+    last_positions = np.array([frame.index[-1] for frame in trade_frames])
+    curve_rows = (rules['Start'].fillna(0).to_numpy(dtype='int64') + last_positions)[has_rules]
+    state = {column: np.full(count, np.nan) for column in ['Equity', 'Threshold', 'ToLiquidation', 'ToTarget']}
+    for column in state:
+        state[column][has_rules] = drawdowns.curves[column].to_numpy()[curve_rows]
+    last_exit = np.array([frame['ExitT'].iloc[-1] for frame in trade_frames], dtype='datetime64[ns]')
+    breach_times = rules['BreachT'].to_numpy(dtype='datetime64[ns]')
+    breach_times = np.where(breach_times <= last_exit, breach_times, np.datetime64('NaT'))
+
+    summary = pd.DataFrame({
+        'ASize': rules['ASize'].to_numpy(),
+        'Trades': lengths,
+        'NetPnL': net_pnl.round(2),
+        'WinRate': wins * 100 / lengths,
+        'LossRate': losses * 100 / lengths,
+        'BeRate': break_evens * 100 / lengths,
+        'AvgWin': avg_win,
+        'AvgLoss': avg_loss,
+        'RR': ratio(avg_win, np.abs(avg_loss)),
+        'ProfitFactor': ratio(gross_profit, gross_loss),
+        'Expectancy': net_pnl / lengths,
+        'TradingDays': day_lengths,
+        'BestDay': np.maximum.reduceat(day_profit, day_starts),
+        'WorstDay': np.minimum.reduceat(day_profit, day_starts),
+        'LastDay': day_profit[day_starts + day_lengths - 1],
+        'Equity': state['Equity'],
+        'Threshold': state['Threshold'],
+        'ToLiquidation': state['ToLiquidation'],
+        'ToTarget': state['ToTarget'],
+        'BreachT': breach_times,
+    }, index=pd.Index(names, name='Account'))
+    return summary
@@ -0,0 +1,122 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QSize, Qt, pyqtSignal
+from PyQt5.QtGui import QImage, QImageReader, QPixmap
+
+
+thumbnail_dir = 'resources/thumbnail_cache'
+memory_budget = 64 * 1024 * 1024  # bytes of decoded pixmaps kept in memory
+display_size = QSize(780, 520)
+
+service = None
+
+
+def cache_key(path, size):
+    # Path, file size and mtime stand in for the file's contents: any rewrite of the screenshot changes
+    # the key without reading the multi-megabyte file to hash it
+    stat = os.stat(path)
+    text = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}|{size.width()}x{size.height()}"
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def pixmap_bytes(pixmap):
+    return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+
+def decode_scaled(path, size):
+    # Let the decoder produce the scaled image directly instead of decoding full resolution first
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    original = reader.size()
+    if original.isValid() and (original.width() > size.width() or original.height() > size.height()):
+        reader.setScaledSize(original.scaled(size, Qt.KeepAspectRatio))
+    return reader.read()
+
+
+class DecodeSignals(QObject):
+    finished = pyqtSignal(str, QImage)
+
+
+class DecodeTask(QRunnable):
+    def __init__(self, key, path, size, signals):
+        super().__init__()
+        self.key = key
+        self.path = path
+        self.size = size
+        self.signals = signals
+
+    def run(self):
+        thumbnail_path = os.path.join(thumbnail_dir, f"{self.key}.png")
+        image = QImage(thumbnail_path) if os.path.exists(thumbnail_path) else QImage()
+        if image.isNull():
+            image = decode_scaled(self.path, self.size)
+            if not image.isNull():
+                try:
+                    os.makedirs(thumbnail_dir, exist_ok=True)
+                    image.save(thumbnail_path + '.tmp.png')
+                    os.replace(thumbnail_path + '.tmp.png', thumbnail_path)
+                except Exception as e:
+                    print(f"Error caching thumbnail: {e}")
+        self.signals.finished.emit(self.key, image)
+
+
+class ScreenshotService(QObject):
+    # Scaled screenshots decoded on a thread pool, kept on disk as thumbnails and in memory as pixmaps
+    # up to memory_budget bytes, least recently used first out
+    loaded = pyqtSignal(str, QPixmap)  # key, pixmap (null when the file could not be decoded)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(2)
+        self.signals = DecodeSignals(self)
+        self.signals.finished.connect(self.on_decoded)
+        self.pixmaps = OrderedDict()
+        self.cached_bytes = 0
+        self.pending = set()
+        self.hits = 0
+        self.misses = 0
+
+    def request(self, path, size=display_size):
+        # (key, pixmap) right away when it is in memory, (key, None) when loaded will deliver it later
+        if not os.path.exists(path):
+            return None, None
+        key = cache_key(path, size)
+        pixmap = self.pixmaps.get(key)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(key)
+            self.hits += 1
+            return key, pixmap
+        self.misses += 1
+        if key not in self.pending:
+            self.pending.add(key)
+            self.pool.start(DecodeTask(key, path, size, self.signals))
+        return key, None
+
+    def prefetch(self, paths, size=display_size):
+        for path in paths:
+            self.request(path, size)
+
+    def on_decoded(self, key, image):
+        # QPixmap only exists on the GUI thread, workers hand over QImages
+        self.pending.discard(key)
+        pixmap = QPixmap.fromImage(image)
+        if not pixmap.isNull():
+            self.store(key, pixmap)
+        self.loaded.emit(key, pixmap)
+
+    def store(self, key, pixmap):
+        self.pixmaps[key] = pixmap
+        self.cached_bytes += pixmap_bytes(pixmap)
+        while self.cached_bytes > memory_budget and len(self.pixmaps) > 1:
+            _, evicted = self.pixmaps.popitem(last=False)
+            self.cached_bytes -= pixmap_bytes(evicted)
+
+
+def get_service():
+    global service
+    if service is None:
+        service = ScreenshotService()
+    return service
@@ -0,0 +1,50 @@
+import builtins
+import sys
+import time
+
+
+class StartupTimer:
+    # Records how long each top-level import takes until the first paint, run with --startup-timing to print it
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.import_times = []
+        self.marks = []
+        self._original_import = None
+        self._depth = 0
+
+    def start(self):
+        if self._original_import is None:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._timed_import
+
+    def stop(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, *args, **kwargs):
+        # Only the outermost import is timed, so every entry includes the modules it pulled in
+        if self._depth or name in sys.modules:
+            return self._original_import(name, *args, **kwargs)
+        self._depth += 1
+        import_start = time.perf_counter()
+        try:
+            return self._original_import(name, *args, **kwargs)
+        finally:
+            self._depth -= 1
+            self.import_times.append((name, time.perf_counter() - import_start))
+
+    def mark(self, label):
+        self.marks.append((label, time.perf_counter() - self.start_time))
+
+    def report(self):
+        lines = ["Startup timing:"]
+        for label, elapsed in self.marks:
+            lines.append(f"  {label}: {elapsed * 1000:.0f} ms")
+        lines.append("  Imports:")
+        for name, elapsed in sorted(self.import_times, key=lambda item: item[1], reverse=True):
+            lines.append(f"    {name}: {elapsed * 1000:.0f} ms")
+        return "\n".join(lines)
+
+
+timer = StartupTimer()
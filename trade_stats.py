@@ -0,0 +1,90 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+import account_summary
+import instruments
+import trade_store
+
+
+TradeStats = namedtuple('TradeStats', ['net_pnl', 'total_trades', 'wins', 'losses', 'break_evens', 'win_rate',
+                                       'loss_rate', 'break_even_rate', 'avg_win', 'avg_loss', 'avg_rr',
+                                       'profit_factor', 'expectancy', 'max_consecutive_wins',
+                                       'max_consecutive_losses'])
+
+loss, break_even, win = -1, 0, 1
+settings_path = 'resources/account_settings.csv'
+
+
+def classify(profit, thresholds):
+    return np.select([profit < 0, profit <= thresholds], [loss, break_even], win)
+
+
+def max_run(mask):
+    # Longest streak of True values
+    if not mask.any():
+        return 0
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.view(np.int8), [0]))))
+    return int((edges[1::2] - edges[::2]).max())
+
+
+def mean(total, count):
+    return total / count if count else np.nan
+
+
+def compute_stats(trades, bet):
+    # trades: one row per trade (account_summary rollup), bet: the account's break-even threshold in ticks
+    profit = trades['Profit'].to_numpy(dtype='float64')
+    # The break-even threshold is bet ticks of the traded contract, unknown contracts break even at 0
+    tick_values = instruments.tick_values[instruments.trade_root_codes(trades)]
+    thresholds = np.where(tick_values == 0, 0.0, tick_values * bet)
+    results = classify(profit, thresholds)
+    is_win = results == win
+    is_loss = results == loss
+    total_trades = len(profit)
+    wins = int(is_win.sum())
+    losses = int(is_loss.sum())
+    break_evens = total_trades - wins - losses
+    avg_win = mean(profit[is_win].sum(), wins)
+    avg_loss = mean(profit[is_loss].sum(), losses)
+    gross_profit = profit[profit > 0].sum()
+    gross_loss = -profit[profit < 0].sum()
+    net_pnl = profit.sum()
+    return TradeStats(
+        net_pnl=net_pnl,
+        total_trades=total_trades,
+        wins=wins,
+        losses=losses,
+        break_evens=break_evens,
+        win_rate=wins * 100 / total_trades if total_trades else 0,
+        loss_rate=losses * 100 / total_trades if total_trades else 0,
+        break_even_rate=break_evens * 100 / total_trades if total_trades else 0,
+        avg_win=avg_win,
+        avg_loss=avg_loss,
+        avg_rr=avg_win / abs(avg_loss) if losses else np.nan,
+        profit_factor=gross_profit / gross_loss if gross_loss else np.nan,
+        expectancy=mean(net_pnl, total_trades),
+        max_consecutive_wins=max_run(is_win),
+        max_consecutive_losses=max_run(is_loss),
+    )
+
+
+def account_bet(account, data_settings=None):
+    if data_settings is None:
+        data_settings = pd.read_csv(settings_path)
+    account_row = data_settings.loc[data_settings['Account'] == account]
+    return account_row['BeT'].values[0] if not account_row.empty else np.nan
+
+
+def account_stats(account, start=None, end=None, bet=None, summaries=None):
+    # Headless entry point: stats for one account over [start, end] straight from the trade store
+    if summaries is None:
+        summaries = account_summary.load_summaries(trade_store.store_dir)
+    summary = summaries.get(account)
+    if summary is None:
+        return compute_stats(pd.DataFrame({'Profit': [], 'Instrument': []}), np.nan)
+    trades, _ = summary.between(start, end)
+    if bet is None:
+        bet = account_bet(account)
+    return compute_stats(trades, bet)
@@ -0,0 +1,347 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+
+store_dir = 'resources/trade_store'
+legacy_csv_path = 'resources/to_use_data.csv'
+meta_file_name = 'meta.json'
+store_version = 1
+
+columns = ['Instrument', 'Account', 'LorS', 'Qty', 'EntryP', 'ExitP', 'EntryT', 'ExitT', 'Profit', 'Com']
+category_columns = ['Instrument', 'Account', 'LorS']
+time_columns = ['EntryT', 'ExitT']
+int_columns = ['Qty']
+float_columns = ['EntryP', 'ExitP', 'Profit', 'Com']
+csv_time_format = '%Y-%m-%d %H:%M:%S'
+fingerprint_columns = ['Account', 'Instrument', 'EntryT', 'ExitT', 'Qty', 'EntryP', 'ExitP']
+
+
+def store_exists(path=store_dir):
+    return os.path.exists(os.path.join(path, meta_file_name))
+
+
+def has_data(path=store_dir):
+    return store_exists(path) or (os.path.exists(legacy_csv_path) and os.stat(legacy_csv_path).st_size > 0)
+
+
+def empty_meta():
+    return {
+        'version': store_version,
+        'rows': 0,
+        'next_segment': 0,
+        'segments': [],
+        'categories': {column: [] for column in category_columns},
+    }
+
+
+def read_meta(path=store_dir):
+    if not store_exists(path):
+        return empty_meta()
+    with open(os.path.join(path, meta_file_name), 'r') as f:
+        meta = json.load(f)
+    # Stores written before fingerprint dedup kept a per-account high-water mark nothing reads any more
+    meta.pop('high_water', None)
+    return meta
+
+
+def write_meta(meta, path=store_dir):
+    # Write to a temp file first so a crash never leaves a half-written meta.json behind
+    os.makedirs(path, exist_ok=True)
+    meta_path = os.path.join(path, meta_file_name)
+    tmp_path = meta_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+
+def ensure_store(path=store_dir):
+    if not store_exists(path) and os.path.exists(legacy_csv_path) and os.stat(legacy_csv_path).st_size > 0:
+        migrate_from_csv(legacy_csv_path, path)
+
+
+def to_ns(values):
+    # Timestamps are stored as int64 nanoseconds, NaT maps to the int64 minimum
+    times = pd.to_datetime(pd.Series(values), errors='coerce').astype('datetime64[ns]')
+    return times.to_numpy().view('int64')
+
+
+def from_ns(values):
+    return pd.Series(np.asarray(values, dtype='int64').view('datetime64[ns]'))
+
+
+def encode_frame(trades, meta):
+    arrays = {}
+    for column in category_columns:
+        categories = meta['categories'][column]
+        # Categories are stored as strings, so a numeric account ID has to be matched as one
+        values = trades[column]
+        if pd.api.types.is_float_dtype(values) and (values.dropna() % 1 == 0).all():
+            values = values.astype('Int64')  # IDs that only went float because of a blank cell
+        codes, uniques = pd.factorize(values)
+        names = [str(value) for value in uniques]
+        positions = {name: i for i, name in enumerate(categories)}
+        for name in names:
+            if name not in positions:
+                positions[name] = len(categories)
+                categories.append(name)
+        lookup = np.array([positions[name] for name in names] + [-1], dtype='int32')
+        arrays[column] = lookup[codes]
+    for column in time_columns:
+        arrays[column] = to_ns(trades[column])
+    for column in int_columns:
+        arrays[column] = pd.to_numeric(trades[column], errors='coerce').fillna(0).to_numpy(dtype='int64')
+    for column in float_columns:
+        arrays[column] = pd.to_numeric(trades[column], errors='coerce').to_numpy(dtype='float64')
+    return arrays
+
+
+def decode_arrays(arrays, meta):
+    trades = pd.DataFrame(index=pd.RangeIndex(len(arrays['Qty'])))
+    for column in columns:
+        if column in category_columns:
+            trades[column] = pd.Categorical.from_codes(arrays[column], categories=meta['categories'][column])
+        elif column in time_columns:
+            trades[column] = from_ns(arrays[column])
+        else:
+            trades[column] = arrays[column]
+    return trades
+
+
+def empty_frame(meta=None):
+    meta = meta or empty_meta()
+    arrays = {column: np.empty(0, dtype='int32') for column in category_columns}
+    arrays.update({column: np.empty(0, dtype='int64') for column in time_columns + int_columns})
+    arrays.update({column: np.empty(0, dtype='float64') for column in float_columns})
+    return decode_arrays(arrays, meta)
+
+
+def base_fingerprints(arrays, meta):
+    # One uint64 per fill over the fingerprint columns
+    key = {}
+    for column in fingerprint_columns:
+        if column in category_columns:
+            category_hashes = pd.util.hash_array(np.asarray(meta['categories'][column] + [''], dtype=object))
+            key[column] = category_hashes[arrays[column]]
+        elif column in float_columns:
+            key[column] = np.round(arrays[column], 6) + 0.0
+        else:
+            key[column] = arrays[column]
+    return pd.util.hash_pandas_object(pd.DataFrame(key), index=False).to_numpy()
+
+
+def occurrence_numbers(base_hashes):
+    return pd.Series(base_hashes).groupby(base_hashes, sort=False).cumcount().to_numpy()
+
+
+def mix_occurrence(base_hashes, occurrence):
+    # Identical fills inside one import get their occurrence number mixed in, so genuinely
+    # repeated fills survive while re-imports of the same export are still caught.
+    hashes = base_hashes.copy()
+    repeated = occurrence > 0
+    if repeated.any():
+        hashes[repeated] = pd.util.hash_array(base_hashes[repeated] ^ occurrence[repeated].astype('uint64'))
+    return hashes
+
+
+def fingerprint_arrays(arrays, meta):
+    base_hashes = base_fingerprints(arrays, meta)
+    return mix_occurrence(base_hashes, occurrence_numbers(base_hashes))
+
+
+def fingerprint_file(segment_name):
+    return segment_name.replace('.npz', '.fp.npy')
+
+
+def write_segment(arrays, meta, path=store_dir, hashes=None):
+    os.makedirs(path, exist_ok=True)
+    segment_name = f"segment_{meta['next_segment']:06d}.npz"
+    np.savez(os.path.join(path, segment_name), **arrays)
+    if hashes is None:
+        hashes = fingerprint_arrays(arrays, meta)
+    np.save(os.path.join(path, fingerprint_file(segment_name)), np.sort(hashes))
+    meta['next_segment'] += 1
+    return segment_name
+
+
+def segment_fingerprints(segment_name, meta, path=store_dir):
+    # Sorted per-segment index, memory-mapped so a lookup only touches the pages it bisects
+    fingerprint_path = os.path.join(path, fingerprint_file(segment_name))
+    if not os.path.exists(fingerprint_path):
+        with np.load(os.path.join(path, segment_name)) as segment:
+            arrays = {column: segment[column] for column in columns}
+        np.save(fingerprint_path, np.sort(fingerprint_arrays(arrays, meta)))
+    return np.load(fingerprint_path, mmap_mode='r')
+
+
+def contains_fingerprints(hashes, meta, path=store_dir):
+    found = np.zeros(len(hashes), dtype=bool)
+    for segment_name in meta['segments']:
+        index = segment_fingerprints(segment_name, meta, path)
+        if len(index) == 0:
+            continue
+        positions = np.minimum(np.searchsorted(index, hashes), len(index) - 1)
+        found |= index[positions] == hashes
+    return found
+
+
+def remove_segment(segment_name, path=store_dir):
+    os.remove(os.path.join(path, segment_name))
+    fingerprint_path = os.path.join(path, fingerprint_file(segment_name))
+    if os.path.exists(fingerprint_path):
+        os.remove(fingerprint_path)
+
+
+def read_segments(meta, path=store_dir):
+    parts = {column: [] for column in columns}
+    for segment_name in meta['segments']:
+        with np.load(os.path.join(path, segment_name)) as segment:
+            for column in columns:
+                parts[column].append(segment[column])
+    if not meta['segments']:
+        return None
+    return {column: np.concatenate(values) for column, values in parts.items()}
+
+
+def save_trades(trades, path=store_dir):
+    previous_meta = read_meta(path)
+    meta = empty_meta()
+    meta['next_segment'] = previous_meta['next_segment']
+    arrays = encode_frame(trades, meta)
+    replace_segments(arrays, meta, previous_meta['segments'], path)
+
+
+def replace_segments(arrays, meta, old_segments, path=store_dir, hashes=None):
+    meta['segments'] = [write_segment(arrays, meta, path, hashes)]
+    meta['rows'] = len(arrays['Qty'])
+    write_meta(meta, path)
+    for segment_name in old_segments:
+        remove_segment(segment_name, path)
+
+
+class TradeWriter:
+    # Appended chunks are written straight to new segment files, but readers only see them once
+    # commit() rewrites meta.json. rollback() deletes whatever was staged.
+    def __init__(self, path=store_dir):
+        self.path = path
+        self.meta = read_meta(path)
+        self.staged_segments = []
+        self.committed_segments = []
+        self.carried_occurrences = pd.Series(dtype='int64')
+        self.inserted = 0
+        self.skipped = 0
+
+    def start_export(self):
+        # Occurrence numbers restart per export, so a fill seen in two overlapping exports is stored once
+        self.carried_occurrences = pd.Series(dtype='int64')
+
+    def append(self, trades):
+        if trades.empty:
+            return 0
+        arrays = encode_frame(trades, self.meta)
+        base_hashes = base_fingerprints(arrays, self.meta)
+        # Occurrence counts carry over from the previous chunk only; repeated fills sit next to each other in an export
+        occurrence = occurrence_numbers(base_hashes) + self.carried_occurrences.reindex(base_hashes, fill_value=0).to_numpy()
+        self.carried_occurrences = pd.Series(occurrence + 1, index=base_hashes).groupby(level=0).max()
+        hashes = mix_occurrence(base_hashes, occurrence)
+        is_new = ~contains_fingerprints(hashes, self.meta, self.path)
+        inserted = int(is_new.sum())
+        self.inserted += inserted
+        self.skipped += len(trades) - inserted
+        if inserted == 0:
+            return 0
+        arrays = {column: values[is_new] for column, values in arrays.items()}
+        segment_name = write_segment(arrays, self.meta, self.path, hashes[is_new])
+        self.meta['segments'].append(segment_name)
+        self.staged_segments.append(segment_name)
+        self.meta['rows'] += inserted
+        return inserted
+
+    def merge_staged(self):
+        # Fold the staged segments into one so a batch of small exports adds a single segment
+        if len(self.staged_segments) <= 1:
+            return
+        staged = list(self.staged_segments)
+        staged_meta = dict(self.meta, segments=staged)
+        hashes = np.concatenate([segment_fingerprints(segment_name, self.meta, self.path) for segment_name in staged])
+        arrays = read_segments(staged_meta, self.path)
+        segment_name = write_segment(arrays, self.meta, self.path, hashes)
+        for staged_name in staged:
+            remove_segment(staged_name, self.path)
+        self.meta['segments'] = [name for name in self.meta['segments'] if name not in staged] + [segment_name]
+        self.staged_segments = [segment_name]
+
+    def commit(self, merge_staged=False):
+        if merge_staged:
+            self.merge_staged()
+        if self.staged_segments:
+            write_meta(self.meta, self.path)
+        self.committed_segments += self.staged_segments
+        self.staged_segments = []
+        return self.inserted, self.skipped
+
+    def rollback(self):
+        for segment_name in self.staged_segments:
+            remove_segment(segment_name, self.path)
+        self.staged_segments = []
+        self.meta = read_meta(self.path)
+
+
+def append_trades(trades, path=store_dir):
+    # Fills already in the journal are dropped by fingerprint, only the rest is written as a new
+    # segment listed in meta.json. Returns (inserted, skipped).
+    writer = TradeWriter(path)
+    writer.append(trades)
+    return writer.commit()
+
+
+def compact(path=store_dir):
+    # Maintenance rewrite: merge every appended segment back into a single one
+    meta = read_meta(path)
+    if len(meta['segments']) <= 1:
+        print("Trade store is already compact.")
+        return
+    old_segments = list(meta['segments'])
+    hashes = np.concatenate([segment_fingerprints(segment_name, meta, path) for segment_name in old_segments])
+    arrays = read_segments(meta, path)
+    replace_segments(arrays, meta, old_segments, path, hashes)
+    print(f"Compacted {len(old_segments)} segments into one ({meta['rows']} trades).")
+
+
+def load_trades(path=store_dir, segments=None):
+    # segments restricts the load to freshly committed segments, e.g. to refresh a view after an import
+    ensure_store(path)
+    if not store_exists(path):
+        return empty_frame()
+    meta = read_meta(path)
+    if segments is not None:
+        meta['segments'] = [segment_name for segment_name in meta['segments'] if segment_name in segments]
+    arrays = read_segments(meta, path)
+    if arrays is None:
+        return empty_frame(meta)
+    return decode_arrays(arrays, meta)
+
+
+def concat_trades(frames):
+    frames = [frame for frame in frames if frame is not None]
+    combined = pd.concat(frames, ignore_index=True)
+    for column in category_columns:
+        combined[column] = union_categoricals([frame[column] for frame in frames])
+    return combined
+
+
+def migrate_from_csv(csv_path=legacy_csv_path, path=store_dir):
+    trades = pd.read_csv(csv_path, dtype={column: str for column in category_columns})
+    save_trades(trades[columns], path)
+    print(f"Migrated {len(trades)} trades from {csv_path} to {path}.")
+
+
+def export_csv(csv_path=legacy_csv_path, path=store_dir):
+    trades = load_trades(path)
+    for column in time_columns:
+        trades[column] = trades[column].dt.strftime(csv_time_format)
+    trades.to_csv(csv_path, index=False)
+    print(f"Exported {len(trades)} trades to {csv_path}.")